@@ -15,6 +15,18 @@ class BookEnricher:
         self.project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
         self.client = genai.Client(api_key=self.api_key) if self.api_key else genai.Client(vertexai=True, project=self.project_id)
         self.model_name = model_name
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Shared HTTP client so lookups reuse keep-alive connections."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient()
+        return self._http_client
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     async def enrich_book(self, book_data: Dict[str, Any]) -> tuple[Dict[str, Any], Dict[str, Any]]:
         """
@@ -180,8 +192,7 @@ class BookEnricher:
             
         url = f"https://www.googleapis.com/books/v1/volumes?q={query}&maxResults=1"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10)
+            response = await self._get_http_client().get(url, timeout=10)
             duration = time.perf_counter() - start
             if duration > 2.0:
                 print(f"[Slow API] Google Books for '{title}': {duration:.2f}s")
@@ -225,8 +236,7 @@ class BookEnricher:
             
         url = f"https://openlibrary.org/search.json?{query}&limit=1"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10)
+            response = await self._get_http_client().get(url, timeout=10)
             duration = time.perf_counter() - start
             if duration > 2.0:
                  print(f"[Slow API] Open Library for '{title}': {duration:.2f}s")
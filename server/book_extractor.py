@@ -129,7 +129,7 @@ Only return the table, no other text. Do not include markdown code blocks."""
 
         # Generate response
         print("    Running inference...")
-        start_time = time.time()
+        start_time = time.monotonic()
         try:
             response = await self.client.aio.models.generate_content(
                 model=self.model_name,
@@ -141,7 +141,7 @@ Only return the table, no other text. Do not include markdown code blocks."""
                 ),
             )
             
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
             print(f"    Inference completed in {elapsed:.2f}s")
             
             output_text = response.text
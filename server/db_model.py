@@ -1,13 +1,15 @@
 from pydantic import BaseModel
 from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional, Annotated, Tuple
-from document_store import PartitionKey, SortKey, CopyOfKey
+from document_store import PartitionKey, SortKey, CopyOfKey, cached_hash
 
-@dataclass(frozen=True)
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class UserFrameUploadKey:
     user_id: Annotated[str, PartitionKey]
     session_id: Annotated[str, SortKey]
     frame_id: Annotated[int, SortKey]
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
 @dataclass
 class UserBook:
@@ -34,12 +36,14 @@ class UserFrameUploadEntry:
     library_id: Optional[str] = None
     books: List[Dict[str, Any]] = field(default_factory=list)
 
-@dataclass(frozen=True)
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class UserLibraryBookKey:
     user_id: Annotated[str, PartitionKey(order=1)]
     library_id: Annotated[str, PartitionKey(order=2)]
     shelf: Annotated[str, SortKey(order=1)]
     book_id: Annotated[str, SortKey(order=2)] # ISBN or title|author
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
 @dataclass
 class UserLibraryBook(UserBook):
@@ -47,11 +51,13 @@ class UserLibraryBook(UserBook):
     frame_ids: List[int] = field(default_factory=list)
     copies: int = 1
 
-@dataclass(frozen=True)
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class UserShelfFrameMetadataKey:
     user_id: Annotated[str, PartitionKey(order=1)]
     library_id: Annotated[str, SortKey(order=1)]
     frame_id: Annotated[int, SortKey(order=2)]
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
 @dataclass
 class UserShelfFrameMetadata:
@@ -60,22 +66,29 @@ class UserShelfFrameMetadata:
     book_count: int
     uploaded_at: float
 
-@dataclass(frozen=True)
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class UserLibraryKey:
     user_id: Annotated[str, PartitionKey]
     library_id: Annotated[str, SortKey]
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
 @dataclass
 class UserLibrary:
     key: Annotated[UserLibraryKey, CopyOfKey]
     name: str
     created_at: float
+    # Set on the record stored under the name-derived id of a library created
+    # with a random id; holds that original library_id
+    alias_of: Optional[str] = None
     
-@dataclass(frozen=True)
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class UserShelfKey:
     user_id: Annotated[str, PartitionKey]
     library_id: Annotated[str, SortKey]
     shelf: Annotated[str, SortKey]
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
 @dataclass
 class UserShelf:
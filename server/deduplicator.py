@@ -1,4 +1,5 @@
 from typing import List, Dict, Any, Optional
+from collections import Counter, deque
 
 class BookDeduplicator:
     """Handles deduplication of book metadata."""
@@ -15,6 +16,8 @@ class BookDeduplicator:
         deduplicated = []
         # isbn_count_key -> index in deduplicated list
         recent_entries = {}
+        # Keys in recent_entries, oldest first, so eviction is O(1)
+        window = deque()
         
         for book in books:
             isbn = book.get("isbn")
@@ -46,10 +49,10 @@ class BookDeduplicator:
                 deduplicated.append(book_copy)
                 if key:
                     recent_entries[key] = len(deduplicated) - 1
-                    if len(recent_entries) > window_size:
+                    window.append(key)
+                    if len(window) > window_size:
                         # Remove oldest from map
-                        oldest_key = list(recent_entries.keys())[0]
-                        del recent_entries[oldest_key]
+                        del recent_entries[window.popleft()]
                         
         return deduplicated
 
@@ -62,25 +65,22 @@ class BookDeduplicator:
         if not books:
             return []
             
-        unique_books = {}
-        
-        for book in books:
+        def get_key(book: Dict[str, Any]) -> str:
             isbn = book.get("isbn")
             if isbn:
-                key = f"isbn:{isbn}"
-            else:
-                title = book.get("title", "").lower().strip()
-                author = book.get("author", "").lower().strip()
-                key = f"ta:{title}|{author}".lower().strip()
-            
-            if key in unique_books:
-                unique_books[key]["count"] = unique_books[key].get("count", 1) + 1
-            else:
-                book_copy = book.copy()
-                book_copy["count"] = 1
-                unique_books[key] = book_copy
+                return f"isbn:{isbn}"
+            title = book.get("title", "").lower().strip()
+            author = book.get("author", "").lower().strip()
+            return f"ta:{title}|{author}"
+
+        keys = [get_key(book) for book in books]
+        # Counter keeps keys in first-seen order, so the output order is unchanged
+        counts = Counter(keys)
+        first_seen: Dict[str, Dict[str, Any]] = {}
+        for key, book in zip(keys, books):
+            first_seen.setdefault(key, book)
                 
-        return list(unique_books.values())
+        return [{**first_seen[key], "count": count} for key, count in counts.items()]
 
     @staticmethod
     def deduplicate_richness(books: List[Dict[str, Any]], window_size: int = 20) -> List[Dict[str, Any]]:
@@ -104,8 +104,12 @@ class BookDeduplicator:
             return str(title).lower().strip()
 
         deduplicated = []
+        # Richness of each entry in deduplicated, so it's computed once per book
+        richness = []
         # Store (key, book_index_in_deduplicated) for recent books
         recent_keys = {} # key -> index
+        # Keys in recent_keys, oldest first
+        window = deque()
 
         for book in books:
             key = get_key(book)
@@ -118,12 +122,14 @@ class BookDeduplicator:
                 existing_book = deduplicated[idx]
                 
                 # Compare richness
-                if get_richness(book) > get_richness(existing_book):
+                book_richness = get_richness(book)
+                if book_richness > richness[idx]:
                     # Current book is better, swap but keep the count if it was aggregated
                     new_count = existing_book.get("count", 1) + book.get("count", 1)
                     book_copy = book.copy()
                     book_copy["count"] = new_count
                     deduplicated[idx] = book_copy
+                    richness[idx] = get_richness(book_copy)
                 else:
                     # Existing book is better or equal richness, just increment count
                     existing_book["count"] = existing_book.get("count", 1) + book.get("count", 1)
@@ -135,14 +141,15 @@ class BookDeduplicator:
                 
                 # Add to deduplicated and track it
                 deduplicated.append(book_copy)
+                richness.append(get_richness(book_copy))
                 curr_idx = len(deduplicated) - 1
                 recent_keys[key] = curr_idx
+                window.append(key)
                 
                 # Maintain window: remove keys that are too far back in deduplicated list
                 if len(recent_keys) > window_size:
-                    # Remove the oldest key (the one with the smallest index)
-                    oldest_key = min(recent_keys, key=lambda k: recent_keys[k])
-                    if recent_keys[oldest_key] < curr_idx - window_size:
-                        del recent_keys[oldest_key]
+                    # The oldest key (the one with the smallest index) is first in the window
+                    if recent_keys[window[0]] < curr_idx - window_size:
+                        del recent_keys[window.popleft()]
 
         return deduplicated
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Set, Tuple, Union, TypeVar, Generic, Callable, Annotated, get_type_hints, get_args, get_origin
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union, TypeVar, Generic, Callable, Annotated, get_type_hints, get_args, get_origin
 from dataclasses import dataclass, field, make_dataclass
+import dataclasses
 import datetime
+import functools
+import operator
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from sortedcontainers import SortedDict
 
 @dataclass
 class OperationParams:
@@ -43,39 +48,146 @@ class CopyOfKey:
 K = TypeVar('K')
 V = TypeVar('V')
 
+def cached_hash(cls: type) -> type:
+    """
+    Class decorator for frozen key dataclasses that are hashed repeatedly (dict and set members).
+    Computes the dataclass-generated __hash__ once per instance and keeps it in the class's
+    _cached_hash field, declared as
+    `_cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)`.
+    Apply above @dataclass(frozen=True).
+    """
+    if "_cached_hash" not in getattr(cls, "__dataclass_fields__", {}):
+        raise TypeError(f"{cls.__name__} must declare a _cached_hash field to use @cached_hash")
+    field_hash = cls.__hash__
+
+    def __hash__(self) -> int:
+        h = self._cached_hash
+        if h is None:
+            h = field_hash(self)
+            object.__setattr__(self, "_cached_hash", h)
+        return h
+
+    cls.__hash__ = __hash__
+    return cls
+
+# Index lookups only return values, so the stored key isn't sent back
+_VALUE_PROJECTION = {"_id": 0, "data": 1}
+
+# Cursor batch size for range iterators when the caller doesn't pick one
+_ITERATOR_BATCH_SIZE = 1000
+
+def _with_default_batch_size(params: Optional[GetParams]) -> GetParams:
+    if params is None:
+        return GetParams(batch_size=_ITERATOR_BATCH_SIZE)
+    if params.batch_size is None:
+        return dataclasses.replace(params, batch_size=_ITERATOR_BATCH_SIZE)
+    return params
+
+@functools.lru_cache(maxsize=None)
+def _copy_of_key_fields(cls: type) -> Tuple[str, ...]:
+    """Returns the names of cls fields annotated with CopyOfKey, resolved once per class."""
+    hints = get_type_hints(cls, include_extras=True)
+    names = []
+    for name, hint in hints.items():
+        if get_origin(hint) is Annotated:
+            metadata = get_args(hint)[1:]
+            for m in metadata:
+                if m is CopyOfKey or isinstance(m, CopyOfKey):
+                    names.append(name)
+                    break
+    return tuple(names)
+
+@functools.lru_cache(maxsize=None)
+def _dataclass_field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(cls))
+
+@functools.lru_cache(maxsize=None)
+def _serialization_excluded_fields(cls: type) -> frozenset:
+    """Fields default_to_dict leaves out for cls, resolved once per class."""
+    return frozenset(_copy_of_key_fields(cls))
+
+@functools.lru_cache(maxsize=None)
+def _key_attrs_for(cls: type) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Discovers partition and sort attributes of cls once per class, respecting specified order.
+    Returns (all_attrs, partition_attrs, sort_attrs)
+    """
+    p_attrs = []
+    s_attrs = []
+    try:
+        hints = get_type_hints(cls, include_extras=True)
+        for name, hint in hints.items():
+            if get_origin(hint) is Annotated:
+                metadata = get_args(hint)[1:]
+                for m in metadata:
+                    if m is PartitionKey or isinstance(m, PartitionKey):
+                        order = m.order if isinstance(m, PartitionKey) else 0
+                        p_attrs.append((order, name))
+                    if m is SortKey or isinstance(m, SortKey):
+                        order = m.order if isinstance(m, SortKey) else 0
+                        s_attrs.append((order, name))
+    except Exception as e:
+        print(f"Warning: Failed to discover attributes for {cls}: {e}")
+    
+    # Sort by order, then by name (stable sort)
+    p_attrs.sort(key=lambda x: x[0])
+    s_attrs.sort(key=lambda x: x[0])
+    
+    partition_names = tuple(a[1] for a in p_attrs)
+    sort_names = tuple(a[1] for a in s_attrs)
+    return partition_names + sort_names, partition_names, sort_names
+
+@functools.lru_cache(maxsize=None)
+def _key_extractor(attrs: Tuple[str, ...]) -> Callable[[Any], Tuple[Any, ...]]:
+    """Returns a function reading attrs off an object as a tuple."""
+    if len(attrs) == 1:
+        getter = operator.attrgetter(attrs[0])
+        return lambda obj: (getter(obj),)
+    return operator.attrgetter(*attrs)
+
 def default_to_dict(obj: Any) -> Dict[str, Any]:
     """
     Very simple reflection helper to convert an object to a dict.
     Excludes fields annotated with CopyOfKey.
     """
     if hasattr(obj, "__dict__"):
-        result = {}
         # Check for CopyOfKey annotations
         try:
-            hints = get_type_hints(type(obj), include_extras=True)
-            copy_of_key_fields = set()
-            for name, hint in hints.items():
-                if get_origin(hint) is Annotated:
-                    metadata = get_args(hint)[1:]
-                    for m in metadata:
-                        if m is CopyOfKey or isinstance(m, CopyOfKey):
-                            copy_of_key_fields.add(name)
-                            break
-            
-            # Build dict excluding CopyOfKey fields and private fields
-            for k, v in obj.__dict__.items():
-                if not v:
-                    continue
-                if not k.startswith("_") and k not in copy_of_key_fields:
-                    result[k] = v
-            return result
+            excluded = _serialization_excluded_fields(type(obj))
         except Exception:
             # Fallback to simple filtering if type hints fail
             return {k: v for k, v in obj.__dict__.items() if not k.startswith("_")}
+        
+        # Build dict excluding empty values, CopyOfKey fields and private fields.
+        # Reads __dict__ rather than the declared fields so attributes set on
+        # an instance after construction are kept.
+        return {k: v for k, v in obj.__dict__.items() if v and k not in excluded and not k.startswith("_")}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # Slotted dataclasses have no __dict__, read their declared fields instead
+        excluded = _serialization_excluded_fields(type(obj))
+        return {name: v for name in _dataclass_field_names(type(obj))
+                if name not in excluded and not name.startswith("_") and (v := getattr(obj, name))}
     if isinstance(obj, dict):
         return obj
     return {"value": obj}
 
+def make_from_dict(cls: type) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Builds a from_dict_fn for a dataclass that passes fields positionally.
+    Dicts missing a field (empty values are not stored) go through cls(**d) so defaults apply.
+    """
+    names = [f.name for f in dataclasses.fields(cls) if f.init]
+    getter = operator.itemgetter(*names)
+    if len(names) == 1:
+        return lambda d: cls(**d) if names[0] not in d else cls(d[names[0]])
+
+    def from_dict(d: Dict[str, Any]) -> Any:
+        try:
+            return cls(*getter(d))
+        except KeyError:
+            return cls(**d)
+    return from_dict
+
 class DocumentStore(Generic[K, V], ABC):
     def __init__(
         self, 
@@ -94,38 +206,21 @@ class DocumentStore(Generic[K, V], ABC):
         self.data_type = data_type
         self._to_dict_fn = to_dict_fn
         self._from_dict_fn = from_dict_fn
+        # Resolve the key schema up front rather than on first use
+        if key_type is not None and not key_attrs:
+            self._discover_attrs(key_type)
+        # Keys of the declared key type skip attribute resolution in _get_key_tuple
+        self._declared_key_extractor = _key_extractor(tuple(self._key_attrs)) if key_type is not None and self._key_attrs else None
+        # Pick the dict -> V conversion once rather than on every read
+        self._decode_data = self._build_decode_data()
 
     def _discover_attrs_for(self, cls: type) -> Tuple[List[str], List[str], List[str]]:
         """
         Discovers partition and sort attributes for any class, respecting specified order.
         Returns (all_attrs, partition_attrs, sort_attrs)
         """
-        p_attrs = []
-        s_attrs = []
-        try:
-            hints = get_type_hints(cls, include_extras=True)
-            for name, hint in hints.items():
-                if get_origin(hint) is Annotated:
-                    metadata = get_args(hint)[1:]
-                    for m in metadata:
-                        if m is PartitionKey or isinstance(m, PartitionKey):
-                            order = m.order if isinstance(m, PartitionKey) else 0
-                            p_attrs.append((order, name))
-                        if m is SortKey or isinstance(m, SortKey):
-                            order = m.order if isinstance(m, SortKey) else 0
-                            s_attrs.append((order, name))
-        except Exception as e:
-            print(f"Warning: Failed to discover attributes for {cls}: {e}")
-        
-        # Sort by order, then by name (stable sort)
-        p_attrs.sort(key=lambda x: x[0])
-        s_attrs.sort(key=lambda x: x[0])
-        
-        partition_names = [a[1] for a in p_attrs]
-        sort_names = [a[1] for a in s_attrs]
-        all_names = partition_names + sort_names
-        
-        return all_names, partition_names, sort_names
+        all_names, partition_names, sort_names = _key_attrs_for(cls)
+        return list(all_names), list(partition_names), list(sort_names)
 
     def _discover_attrs(self, cls: type):
         """
@@ -138,6 +233,10 @@ class DocumentStore(Generic[K, V], ABC):
             self._sort_attrs = s_a
 
     def _get_key_tuple(self, obj: Any, attrs: Optional[List[str]] = None) -> Tuple[Any, ...]:
+        if attrs is None and self._declared_key_extractor is not None and type(obj) is self.key_type:
+            # Empty values read as None, same as going through default_to_dict
+            return tuple(v if v else None for v in self._declared_key_extractor(obj))
+
         # If attrs are not provided, use instance defaults
         key_attrs = attrs if attrs is not None else self._key_attrs
 
@@ -157,6 +256,13 @@ class DocumentStore(Generic[K, V], ABC):
         if isinstance(obj, (str, int, float, bool, datetime.date, tuple)):
             return obj if isinstance(obj, tuple) else (obj,)
 
+        if not isinstance(obj, dict):
+            try:
+                # Empty values read as None, same as going through default_to_dict
+                return tuple(v if v else None for v in _key_extractor(tuple(key_attrs))(obj))
+            except AttributeError:
+                pass
+
         d = default_to_dict(obj) if not isinstance(obj, dict) else obj
         
         return tuple(d.get(attr) for attr in key_attrs)
@@ -217,16 +323,10 @@ class DocumentStore(Generic[K, V], ABC):
             return None
         
         try:
-            hints = get_type_hints(self.data_type, include_extras=True)
-            for name, hint in hints.items():
-                if get_origin(hint) is Annotated:
-                    metadata = get_args(hint)[1:]
-                    for m in metadata:
-                        if m is CopyOfKey or isinstance(m, CopyOfKey):
-                            return name
+            fields = _copy_of_key_fields(self.data_type)
         except Exception:
-            pass
-        return None
+            return None
+        return fields[0] if fields else None
     
     def _populate_copy_of_key_field(self, obj: V, key: K) -> V:
         """Populates the CopyOfKey field on obj with the given key, if such a field exists."""
@@ -239,28 +339,37 @@ class DocumentStore(Generic[K, V], ABC):
                 pass
         return obj
 
+    def _build_decode_data(self) -> Callable[[Dict[str, Any]], V]:
+        """
+        Returns the function converting a stored dict to V: from_dict_fn if given,
+        otherwise data_type(**data), otherwise the dict itself.
+        """
+        if self._from_dict_fn:
+            return self._from_dict_fn
+        data_type = self.data_type
+        if not data_type:
+            return lambda data: data  # type: ignore
+
+        copy_of_key_field = self._get_copy_of_key_field()
+
+        def decode(data: Dict[str, Any]) -> V:
+            data_for_init = data
+            # If there's a CopyOfKey field, add it to data for instantiation
+            if copy_of_key_field and copy_of_key_field not in data:
+                data_for_init = {**data, copy_of_key_field: None}
+            try:
+                return data_type(**data_for_init)
+            except Exception:
+                # If instantiation fails, return the dict as fallback
+                return data  # type: ignore
+        return decode
+
     def _from_data_dict(self, data: Dict[str, Any], key: Optional[K] = None) -> V:
         """
         Convert dict to V object. If key is provided and V has a CopyOfKey field,
         populate it with the key.
         """
-        obj: V
-        if self._from_dict_fn:
-            obj = self._from_dict_fn(data)
-        elif self.data_type:
-             # If there's a CopyOfKey field, add it to data for instantiation
-             copy_of_key_field = self._get_copy_of_key_field()
-             data_for_init = data.copy()
-             if copy_of_key_field and copy_of_key_field not in data_for_init:
-                 data_for_init[copy_of_key_field] = None
-             
-             try:
-                 obj = self.data_type(**data_for_init)
-             except Exception as e:
-                 # If instantiation fails, return the dict as fallback
-                 obj = data  # type: ignore
-        else:
-            obj = data  # type: ignore
+        obj = self._decode_data(data)
         
         # Populate CopyOfKey field with actual key if provided
         if key is not None and not isinstance(obj, dict):
@@ -281,7 +390,7 @@ class DocumentStore(Generic[K, V], ABC):
         pass
 
     @abstractmethod
-    def batch_get(self, keys: Set[K], params: Optional[GetParams] = None) -> Dict[K, V]:
+    def batch_get(self, keys: Iterable[K], params: Optional[GetParams] = None) -> Dict[K, V]:
         pass
 
     @abstractmethod
@@ -312,10 +421,27 @@ class DocumentStore(Generic[K, V], ABC):
     def delete_range(self, start_key: K, end_key: K, params: Optional[DeleteParams] = None):
         pass
 
+    def replace_range(self, start_key: K, end_key: K, items: Dict[K, V], params: Optional[PutParams] = None):
+        """
+        Deletes everything in [start_key, end_key] and stores items in its place.
+        Stores that can do this in a single round trip override it.
+        """
+        self.delete_range(start_key, end_key)
+        self.batch_put(items, params)
+
     @abstractmethod
     def create_table(self):
         pass
 
+    def create_index(self, index_type: type, covered_fields: Optional[List[str]] = None):
+        """
+        Creates a secondary index for get_by_index* lookups with index_type keys.
+        covered_fields are extra data fields stored in the index, so lookups fetching
+        only those fields can be answered from the index alone.
+        Stores without secondary index support ignore it.
+        """
+        pass
+
     @abstractmethod
     def drop_table(self):
         pass
@@ -324,11 +450,15 @@ class DocumentStore(Generic[K, V], ABC):
     def close(self):
         pass
 
+def _sortable_key_tuple(key_tuple: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    # Empty key values are read as None, order them before any other value
+    return tuple((v is not None, v) for v in key_tuple)
+
 class InMemoryDocumentStore(DocumentStore[K, V]):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Storage: key_tuple -> data_dict
-        self._storage: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        # Storage: key_tuple -> data_dict, kept in key order so ranges don't need a sort
+        self._storage: SortedDict = SortedDict(_sortable_key_tuple)
 
     def put(self, key: K, data: V, params: Optional[PutParams] = None):
         key_tuple = self._get_key_tuple(key)
@@ -343,29 +473,24 @@ class InMemoryDocumentStore(DocumentStore[K, V]):
         data = self._storage.get(key_tuple)
         return self._from_data_dict(data, key) if data is not None else None
 
-    def batch_get(self, keys: Set[K], params: Optional[GetParams] = None) -> Dict[K, V]:
+    def batch_get(self, keys: Iterable[K], params: Optional[GetParams] = None) -> Dict[K, V]:
         results = {}
         for k in keys:
-            val = self.get(k, params)
-            if val is not None:
-                results[k] = val
+            data = self._storage.get(self._get_key_tuple(k))
+            if data is not None:
+                results[k] = self._from_data_dict(data, k)
         return results
 
+    def _irange(self, start_key: K, end_key: K, reverse: bool = False):
+        return self._storage.irange(self._get_key_tuple(start_key), self._get_key_tuple(end_key), reverse=reverse)
+
     def get_range(self, start_key: K, end_key: K, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
-        s_tuple = self._get_key_tuple(start_key)
-        e_tuple = self._get_key_tuple(end_key)
-        
-        results = []
-        for k_tuple in sorted(self._storage.keys(), reverse=params.reverse if params else False):
-            if s_tuple <= k_tuple <= e_tuple:
-                k = self._reconstruct_key(k_tuple)
-                results.append((k, self._from_data_dict(self._storage[k_tuple], k))) # type: ignore
-        return results
+        return list(self.get_range_iterator(start_key, end_key, params))
 
     def get_range_iterator(self, start_key: K, end_key: K, params: Optional[GetParams] = None):
-        items = self.get_range(start_key, end_key, params)
-        for item in items:
-            yield item
+        for k_tuple in self._irange(start_key, end_key, params.reverse if params else False):
+            k = self._reconstruct_key(k_tuple)
+            yield (k, self._from_data_dict(self._storage[k_tuple], k)) # type: ignore
 
     def _match_index(self, obj_data: Dict[str, Any], target_tuple: Tuple[Any, ...], idx_attrs: List[str]) -> bool:
         # Construct current object's index key values
@@ -408,13 +533,7 @@ class InMemoryDocumentStore(DocumentStore[K, V]):
             del self._storage[key_tuple]
 
     def delete_range(self, start_key: K, end_key: K, params: Optional[DeleteParams] = None):
-        s_tuple = self._get_key_tuple(start_key)
-        e_tuple = self._get_key_tuple(end_key)
-        
-        keys_to_delete = [
-            k for k in self._storage.keys() 
-            if s_tuple <= k <= e_tuple
-        ]
+        keys_to_delete = list(self._irange(start_key, end_key))
         for k in keys_to_delete:
             del self._storage[k]
 
@@ -434,205 +553,250 @@ class MongoDocumentStore(DocumentStore[K, V]):
         self.db = self.client[database_name]
         self.collection_name = collection_name
         self.collection = self.db[collection_name]
+        # Index spec create_index has built for each index type
+        self._index_specs: Dict[type, List[Tuple[str, int]]] = {}
 
     def _key_to_mongo_query(self, key: K) -> Dict[str, Any]:
         # Ensure discovery
         if not self._key_attrs:
             self._discover_attrs(type(key))
 
-        vals = self._get_key_tuple(key)
-        
+        return {"_id": self._key_tuple_to_mongo_id(self._get_key_tuple(key))}
+
+    def _key_tuple_to_mongo_id(self, vals: Tuple[Any, ...]) -> Any:
         # 1. Mapped attributes (Preferred for complex keys)
         if self._key_attrs and len(self._key_attrs) == len(vals):
-             return {"_id": {attr: val for attr, val in zip(self._key_attrs, vals)}}
+             return {attr: val for attr, val in zip(self._key_attrs, vals)}
         
         # 2. Single generic value (primitive)
         if len(vals) == 1:
-             return {"_id": vals[0]}
+             return vals[0]
 
         # 3. Tuple/List generic (multiple values, no attrs)
         # Wrap in dict to avoid array _id error if strict
         # But for range queries, this wrapper might be annoying.
         # However, we must avoid top-level array _id.
-        return {"_id": {"v": list(vals)}}
+        return {"v": list(vals)}
 
-    def put(self, key: K, data: V, params: Optional[PutParams] = None):
+    def _id_to_key_tuple(self, _id: Any) -> Tuple[Any, ...]:
+        """Inverse of _key_to_mongo_query: converts a stored _id back to key values."""
+        if isinstance(_id, dict) and "v" in _id and len(_id) == 1 and isinstance(_id["v"], list):
+            # Case 3: Tuple wrapped in dict
+            return tuple(_id["v"])
+        if isinstance(_id, dict) and self._key_attrs:
+            # Case 1: Mapped attrs
+            return tuple(_id.get(attr) for attr in self._key_attrs)
+        if isinstance(_id, dict):
+            # Fallback for dict without known attrs (maybe usage of insertion order?)
+            return tuple(_id.values())
+        if isinstance(_id, list):
+            # Should not happen with new logic, but for robustness
+            return tuple(_id)
+        # Case 2: Primitive (int, str, etc)
+        return (_id,)
+
+    def _range_query(self, start_key: K, end_key: K) -> Dict[str, Any]:
+        s_query = self._key_to_mongo_query(start_key)["_id"]
+        e_query = self._key_to_mongo_query(end_key)["_id"]
+        return {
+            "_id": {
+                "$gte": s_query,
+                "$lte": e_query
+            }
+        }
+
+    def _to_mongo_doc(self, key: K, data: V) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Returns (filter, document) for storing data under key."""
         mongo_filter = self._key_to_mongo_query(key)
         doc = mongo_filter.copy()
         doc["data"] = self._to_data_dict(data)
+        return mongo_filter, doc
+
+    def put(self, key: K, data: V, params: Optional[PutParams] = None):
+        mongo_filter, doc = self._to_mongo_doc(key, data)
         self.collection.replace_one(mongo_filter, doc, upsert=True)
 
     def batch_put(self, items: Dict[K, V], params: Optional[PutParams] = None):
         from pymongo import ReplaceOne
         operations = []
         for key, data in items.items():
-            mongo_filter = self._key_to_mongo_query(key)
-            doc = mongo_filter.copy()
-            doc["data"] = self._to_data_dict(data)
+            mongo_filter, doc = self._to_mongo_doc(key, data)
             operations.append(ReplaceOne(mongo_filter, doc, upsert=True))
         if operations:
-            self.collection.bulk_write(operations)
+            # Keys are distinct, so the server may apply the writes in any order
+            self.collection.bulk_write(operations, ordered=False)
 
     def get(self, key: K, params: Optional[GetParams] = None) -> Optional[V]:
         query = self._key_to_mongo_query(key)
         doc = self.collection.find_one(query)
         return self._from_data_dict(doc["data"], key) if doc else None
 
-    def batch_get(self, keys: Set[K], params: Optional[GetParams] = None) -> Dict[K, V]:
-        # Map key_tuple -> original key
+    def _batch_get_query(self, keys: Iterable[K]) -> Tuple[Dict[str, Any], Dict[Tuple[Any, ...], K]]:
+        """Returns the $in query for keys and a map of key tuple -> original key."""
         key_map = {}
         ids = []
         for k in keys:
-             q = self._key_to_mongo_query(k)
-             ids.append(q["_id"])
-             # Store mapping by the immutable _id representation (for dicts we need tuple)
-             # _id can be a dict (if attrs are known) or list.
-             # We need a stable key for the map.
-             
-             # Let's use the tuple values as the stable key for mapping
+             if not self._key_attrs:
+                 self._discover_attrs(type(k))
+             # The key tuple is the stable, cheaply hashed key for the map,
+             # and repeated keys only go into the $in list once
              kt = self._get_key_tuple(k)
+             if kt in key_map:
+                 continue
              key_map[kt] = k
+             ids.append(self._key_tuple_to_mongo_id(kt))
+
+        return {"_id": {"$in": ids}}, key_map
 
-        query = {"_id": {"$in": ids}}
+    def _batch_get_item(self, doc: Dict[str, Any], key_map: Dict[Tuple[Any, ...], K]) -> Tuple[K, V]:
+        vals = self._id_to_key_tuple(doc["_id"])
+        k = key_map.get(vals)
+        if not k:
+            k = self._reconstruct_key(vals)
+        return k, self._from_data_dict(doc["data"], k)
+
+    def batch_get(self, keys: Iterable[K], params: Optional[GetParams] = None) -> Dict[K, V]:
+        query, key_map = self._batch_get_query(keys)
         cursor = self.collection.find(query)
-        
-        results = {}
-        for doc in cursor:
-            _id = doc["_id"]
-            if isinstance(_id, dict) and "v" in _id and len(_id) == 1 and isinstance(_id["v"], list):
-                 vals = tuple(_id["v"])
-            elif isinstance(_id, dict) and self._key_attrs:
-                 vals = tuple(_id.get(attr) for attr in self._key_attrs)
-            elif isinstance(_id, dict):
-                 vals = tuple(_id.values())
-            elif isinstance(_id, list):
-                 vals = tuple(_id)
-            else:
-                 vals = (_id,)
-                 
-            original_k = key_map.get(vals)
-            if original_k:
-                results[original_k] = self._from_data_dict(doc["data"], original_k)
-            else:
-                k = self._reconstruct_key(vals)
-                results[k] = self._from_data_dict(doc["data"], k)
-        return results
+        return dict(self._batch_get_item(doc, key_map) for doc in cursor)
 
     def get_range(self, start_key: K, end_key: K, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
         cursor = self._get_range_cursor(start_key, end_key, params)
         results = []
         for doc in cursor:
-            _id = doc["_id"]
-            if isinstance(_id, dict) and "v" in _id and len(_id) == 1 and isinstance(_id["v"], list):
-                 # Case 3: Tuple wrapped in dict
-                 vals = tuple(_id["v"])
-            elif isinstance(_id, dict) and self._key_attrs:
-                 # Case 1: Mapped attrs
-                 vals = tuple(_id.get(attr) for attr in self._key_attrs)
-            elif isinstance(_id, dict):
-                 # Fallback for dict without known attrs (maybe usage of insertion order?)
-                 vals = tuple(_id.values())
-            elif isinstance(_id, list):
-                 # Should not happen with new logic, but for robustness
-                 vals = tuple(_id)
-            else:
-                 # Case 2: Primitive (int, str, etc)
-                 vals = (_id,)
-
-            k = self._reconstruct_key(vals)
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
             results.append((k, self._from_data_dict(doc["data"], k)))
         return results
 
-    def _get_range_cursor(self, start_key: K, end_key: K, params: Optional[GetParams] = None):
-        s_query = self._key_to_mongo_query(start_key)["_id"]
-        e_query = self._key_to_mongo_query(end_key)["_id"]
-        
-        query = {
-            "_id": {
-                "$gte": s_query,
-                "$lte": e_query
-            }
-        }
+    def _get_range_cursor(self, start_key: K, end_key: K, params: Optional[GetParams] = None,
+                          data_filter: Optional[Dict[str, Any]] = None, data_fields: Optional[List[str]] = None):
+        query = self._range_query(start_key, end_key)
+        # Filter and projection are on data fields, pushed down to Mongo
+        for attr, val in (data_filter or {}).items():
+            query[f"data.{attr}"] = val
+        projection = {f"data.{attr}": 1 for attr in data_fields} if data_fields else None
         sort_dir = -1 if params and params.reverse else 1
-        cursor = self.collection.find(query).sort("_id", sort_dir)
+        cursor = self.collection.find(query, projection).sort("_id", sort_dir)
         if params and params.batch_size:
             cursor.batch_size(params.batch_size)
         return cursor
 
     def get_range_iterator(self, start_key: K, end_key: K, params: Optional[GetParams] = None):
-        cursor = self._get_range_cursor(start_key, end_key, params)
+        cursor = self._get_range_cursor(start_key, end_key, _with_default_batch_size(params))
         for doc in cursor:
-            _id = doc["_id"]
-            if isinstance(_id, dict) and "v" in _id and len(_id) == 1 and isinstance(_id["v"], list):
-                 vals = tuple(_id["v"])
-            elif isinstance(_id, dict) and self._key_attrs:
-                 vals = tuple(_id.get(attr) for attr in self._key_attrs)
-            elif isinstance(_id, dict):
-                 vals = tuple(_id.values())
-            elif isinstance(_id, list):
-                 vals = tuple(_id)
-            else:
-                 vals = (_id,)
-
-            k = self._reconstruct_key(vals)
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
             yield (k, self._from_data_dict(doc["data"], k))
 
+    def get_range_filtered(self, start_key: K, end_key: K, data_filter: Dict[str, Any],
+                           data_fields: Optional[List[str]] = None, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
+        """
+        Like get_range, but only returns items whose data matches data_filter (evaluated by Mongo).
+        If data_fields is given, only those data fields are fetched.
+        """
+        cursor = self._get_range_cursor(start_key, end_key, params, data_filter, data_fields)
+        results = []
+        for doc in cursor:
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
+            results.append((k, self._from_data_dict(doc.get("data", {}), k)))
+        return results
+
+    def get_range_stream(self, start_key: K, end_key: K, data_fields: Optional[List[str]] = None,
+                         params: Optional[GetParams] = None):
+        """
+        Yields (key, data dict) pairs for the range without building value dataclasses.
+        If data_fields is given, only those data fields are fetched.
+        """
+        params = params or GetParams(batch_size=500)
+        for doc in self._get_range_cursor(start_key, end_key, params, data_fields=data_fields):
+            yield (self._reconstruct_key(self._id_to_key_tuple(doc["_id"])), doc.get("data", {}))
+
     def _index_to_mongo_query(self, vals: Tuple[Any, ...], attrs: List[str]) -> Dict[str, Any]:
         query = {}
         for i, attr in enumerate(attrs):
             query[f"data.{attr}"] = vals[i]
         return query
 
-    def get_by_index(self, index_key: Any, params: Optional[GetParams] = None) -> List[V]:
+    def _index_query(self, index_key: Any) -> Dict[str, Any]:
         all_a, _, _ = self._discover_attrs_for(type(index_key))
         vals = self._get_key_tuple(index_key, all_a)
-        query = self._index_to_mongo_query(vals, all_a)
-        # In a real app we'd want an index for sorting too
-        cursor = self.collection.find(query)
+        return self._index_to_mongo_query(vals, all_a)
+
+    def _index_projection(self, index_type: type, data_fields: Optional[List[str]]) -> Dict[str, int]:
+        if not data_fields:
+            return _VALUE_PROJECTION
+        # The index fields are always fetched, range lookups compare them in memory
+        attrs, _, _ = self._discover_attrs_for(index_type)
+        return {"_id": 0, **{f"data.{a}": 1 for a in dict.fromkeys([*attrs, *data_fields])}}
+
+    def get_by_index(self, index_key: Any, params: Optional[GetParams] = None,
+                     data_fields: Optional[List[str]] = None) -> List[V]:
+        """
+        If data_fields is given, only those data fields (plus the index fields) are
+        fetched and the items are returned as data dicts.
+        """
+        self._ensure_index(type(index_key))
+        cursor = self.collection.find(self._index_query(index_key), self._index_projection(type(index_key), data_fields))
+        if data_fields:
+            return [doc["data"] for doc in cursor]
         return [self._from_data_dict(doc["data"], None) for doc in cursor]
 
-    def _get_index_range_cursor(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None):
-        attrs, _, _ = self._discover_attrs_for(type(start_index))
+    def _get_index_range_cursor(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                                data_fields: Optional[List[str]] = None):
+        index_type = type(start_index)
+        attrs, _, _ = self._discover_attrs_for(index_type)
         s_vals = self._get_key_tuple(start_index, attrs)
         e_vals = self._get_key_tuple(end_index, attrs)
         
+        # Bound the scan on the leading index field, the full tuple comparison is done by the caller
+        query = {}
+        if attrs and s_vals[0] is not None and e_vals[0] is not None:
+            query[f"data.{attrs[0]}"] = {"$gte": s_vals[0], "$lte": e_vals[0]}
+        
         sort_dir = -1 if params and params.reverse else 1
-        cursor = self.collection.find({}).sort([(f"data.{a}", sort_dir) for a in attrs])
+        cursor = self.collection.find(query, self._index_projection(index_type, data_fields)).sort([(f"data.{a}", sort_dir) for a in attrs])
+        if attrs:
+            cursor.hint(self._index_specs[index_type])
         if params and params.batch_size:
             cursor.batch_size(params.batch_size)
         return cursor, attrs, s_vals, e_vals
 
-    def get_by_index_range(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None) -> List[V]:
-        cursor, attrs, s_vals, e_vals = self._get_index_range_cursor(start_index, end_index, params)
-        results = []
-        for doc in cursor:
-            obj_vals = tuple(doc["data"].get(a) for a in attrs)
-            if s_vals <= obj_vals <= e_vals:
-                results.append(self._from_data_dict(doc["data"], None))
-        return results
+    def get_by_index_range(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                           data_fields: Optional[List[str]] = None) -> List[V]:
+        """
+        If data_fields is given, only those data fields (plus the index fields) are
+        fetched and the items are returned as data dicts.
+        """
+        return list(self.get_index_range_iterator(start_index, end_index, params, data_fields))
 
-    def get_index_range_iterator(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None):
-        cursor, attrs, s_vals, e_vals = self._get_index_range_cursor(start_index, end_index, params)
+    def get_index_range_iterator(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                                 data_fields: Optional[List[str]] = None):
+        self._ensure_index(type(start_index))
+        cursor, attrs, s_vals, e_vals = self._get_index_range_cursor(start_index, end_index, params, data_fields)
         for doc in cursor:
             obj_vals = tuple(doc["data"].get(a) for a in attrs)
             if s_vals <= obj_vals <= e_vals:
-                yield self._from_data_dict(doc["data"], None)
+                yield doc["data"] if data_fields else self._from_data_dict(doc["data"], None)
 
     def delete(self, key: K, params: Optional[DeleteParams] = None):
         query = self._key_to_mongo_query(key)
         self.collection.delete_one(query)
 
     def delete_range(self, start_key: K, end_key: K, params: Optional[DeleteParams] = None):
-        s_query = self._key_to_mongo_query(start_key)["_id"]
-        e_query = self._key_to_mongo_query(end_key)["_id"]
-        
-        query = {
-            "_id": {
-                "$gte": s_query,
-                "$lte": e_query
-            }
-        }
-        self.collection.delete_many(query)
+        self.collection.delete_many(self._range_query(start_key, end_key))
+
+    def _replace_range_operations(self, start_key: K, end_key: K, items: Dict[K, V]) -> List[Any]:
+        from pymongo import DeleteMany, ReplaceOne
+        operations: List[Any] = [DeleteMany(self._range_query(start_key, end_key))]
+        for key, data in items.items():
+            # Upsert rather than insert, so an item whose key falls outside
+            # the deleted range overwrites instead of hitting a duplicate _id
+            mongo_filter, doc = self._to_mongo_doc(key, data)
+            operations.append(ReplaceOne(mongo_filter, doc, upsert=True))
+        return operations
+
+    def replace_range(self, start_key: K, end_key: K, items: Dict[K, V], params: Optional[PutParams] = None):
+        # Ordered, so the delete is applied before the upserts
+        self.collection.bulk_write(self._replace_range_operations(start_key, end_key, items), ordered=True)
 
     def create_table(self):
         # In MongoDB, collection is implicitly created on first insert,
@@ -640,6 +804,22 @@ class MongoDocumentStore(DocumentStore[K, V]):
         if self.collection_name not in self.db.list_collection_names():
             self.db.create_collection(self.collection_name)
 
+    def _index_spec(self, index_type: type, covered_fields: Optional[List[str]] = None) -> List[Tuple[str, int]]:
+        # Range queries on the key are served by the _id index, so only
+        # data fields used by get_by_index* need an index of their own
+        attrs, _, _ = self._discover_attrs_for(index_type)
+        return [(f"data.{a}", 1) for a in dict.fromkeys([*attrs, *(covered_fields or [])])]
+
+    def create_index(self, index_type: type, covered_fields: Optional[List[str]] = None):
+        spec = self._index_spec(index_type, covered_fields)
+        self.collection.create_index(spec)
+        self._index_specs[index_type] = spec
+
+    def _ensure_index(self, index_type: type):
+        # Index lookups create their index on first use
+        if index_type not in self._index_specs:
+            self.create_index(index_type)
+
     def drop_table(self):
         self.collection.drop()
 
@@ -648,6 +828,117 @@ class MongoDocumentStore(DocumentStore[K, V]):
             self.client.close()
 
 
+class AsyncMongoDocumentStore(MongoDocumentStore[K, V]):
+    """
+    MongoDocumentStore backed by motor's AsyncIOMotorClient.
+    Uses the same document layout, but every operation is a coroutine so
+    Mongo round trips don't block the event loop.
+    """
+    def __init__(self, client: AsyncIOMotorClient, database_name: str, collection_name: str, *args, **kwargs):
+        super().__init__(client, database_name, collection_name, *args, **kwargs)
+
+    async def put(self, key: K, data: V, params: Optional[PutParams] = None):
+        mongo_filter, doc = self._to_mongo_doc(key, data)
+        await self.collection.replace_one(mongo_filter, doc, upsert=True)
+
+    async def batch_put(self, items: Dict[K, V], params: Optional[PutParams] = None):
+        from pymongo import ReplaceOne
+        operations = []
+        for key, data in items.items():
+            mongo_filter, doc = self._to_mongo_doc(key, data)
+            operations.append(ReplaceOne(mongo_filter, doc, upsert=True))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def get(self, key: K, params: Optional[GetParams] = None) -> Optional[V]:
+        query = self._key_to_mongo_query(key)
+        doc = await self.collection.find_one(query)
+        return self._from_data_dict(doc["data"], key) if doc else None
+
+    async def batch_get(self, keys: Iterable[K], params: Optional[GetParams] = None) -> Dict[K, V]:
+        query, key_map = self._batch_get_query(keys)
+        docs = await self.collection.find(query).to_list(length=None)
+        return dict(self._batch_get_item(doc, key_map) for doc in docs)
+
+    async def get_range(self, start_key: K, end_key: K, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
+        cursor = self._get_range_cursor(start_key, end_key, params)
+        docs = await cursor.to_list(length=None)
+        results = []
+        for doc in docs:
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
+            results.append((k, self._from_data_dict(doc["data"], k)))
+        return results
+
+    async def get_range_iterator(self, start_key: K, end_key: K, params: Optional[GetParams] = None):
+        cursor = self._get_range_cursor(start_key, end_key, _with_default_batch_size(params))
+        async for doc in cursor:
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
+            yield (k, self._from_data_dict(doc["data"], k))
+
+    async def get_range_filtered(self, start_key: K, end_key: K, data_filter: Dict[str, Any],
+                                 data_fields: Optional[List[str]] = None, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
+        cursor = self._get_range_cursor(start_key, end_key, params, data_filter, data_fields)
+        results = []
+        async for doc in cursor:
+            k = self._reconstruct_key(self._id_to_key_tuple(doc["_id"]))
+            results.append((k, self._from_data_dict(doc.get("data", {}), k)))
+        return results
+
+    async def get_range_stream(self, start_key: K, end_key: K, data_fields: Optional[List[str]] = None,
+                               params: Optional[GetParams] = None):
+        params = params or GetParams(batch_size=500)
+        async for doc in self._get_range_cursor(start_key, end_key, params, data_fields=data_fields):
+            yield (self._reconstruct_key(self._id_to_key_tuple(doc["_id"])), doc.get("data", {}))
+
+    async def get_by_index(self, index_key: Any, params: Optional[GetParams] = None,
+                           data_fields: Optional[List[str]] = None) -> List[V]:
+        await self._ensure_index(type(index_key))
+        cursor = self.collection.find(self._index_query(index_key), self._index_projection(type(index_key), data_fields))
+        docs = await cursor.to_list(length=None)
+        if data_fields:
+            return [doc["data"] for doc in docs]
+        return [self._from_data_dict(doc["data"], None) for doc in docs]
+
+    async def get_by_index_range(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                                 data_fields: Optional[List[str]] = None) -> List[V]:
+        return [item async for item in self.get_index_range_iterator(start_index, end_index, params, data_fields)]
+
+    async def get_index_range_iterator(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                                       data_fields: Optional[List[str]] = None):
+        await self._ensure_index(type(start_index))
+        cursor, attrs, s_vals, e_vals = self._get_index_range_cursor(start_index, end_index, params, data_fields)
+        async for doc in cursor:
+            obj_vals = tuple(doc["data"].get(a) for a in attrs)
+            if s_vals <= obj_vals <= e_vals:
+                yield doc["data"] if data_fields else self._from_data_dict(doc["data"], None)
+
+    async def delete(self, key: K, params: Optional[DeleteParams] = None):
+        query = self._key_to_mongo_query(key)
+        await self.collection.delete_one(query)
+
+    async def delete_range(self, start_key: K, end_key: K, params: Optional[DeleteParams] = None):
+        await self.collection.delete_many(self._range_query(start_key, end_key))
+
+    async def replace_range(self, start_key: K, end_key: K, items: Dict[K, V], params: Optional[PutParams] = None):
+        await self.collection.bulk_write(self._replace_range_operations(start_key, end_key, items), ordered=True)
+
+    async def create_table(self):
+        if self.collection_name not in await self.db.list_collection_names():
+            await self.db.create_collection(self.collection_name)
+
+    async def create_index(self, index_type: type, covered_fields: Optional[List[str]] = None):
+        spec = self._index_spec(index_type, covered_fields)
+        await self.collection.create_index(spec)
+        self._index_specs[index_type] = spec
+
+    async def _ensure_index(self, index_type: type):
+        if index_type not in self._index_specs:
+            await self.create_index(index_type)
+
+    async def drop_table(self):
+        await self.collection.drop()
+
+
 class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
     """
     Stores data in a list 'items' within a document identified by partition key.
@@ -659,6 +950,7 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
         self.db = self.client[database_name]
         self.collection = self.db[collection_name]
         self.collection_name = collection_name
+        self._indexed_types: Set[type] = set()
 
     def _key_to_mongo_pk_query(self, key: K) -> Dict[str, Any]:
         # Uses only partition key attributes for the document _id
@@ -707,101 +999,19 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
             }
             self.collection.update_one(pk_query, push_update, upsert=True)
 
-    def batch_put(self, items: Dict[K, V], params: Optional[PutParams] = None):
-        # Naive implementation loop
-        for k, v in items.items():
-            self.put(k, v, params)
-
-    def get(self, key: K, params: Optional[GetParams] = None) -> Optional[V]:
-        pk_query = self._key_to_mongo_pk_query(key)
-        sk_val = self._get_sort_key_value(key)
-        
-        query = pk_query.copy()
-        query["items.sk"] = sk_val
-        
-        # Project only the matching item
-        doc = self.collection.find_one(query, {"items.$": 1})
-        
-        if doc and "items" in doc and doc["items"]:
-            return self._from_data_dict(doc["items"][0]["d"], key)
-        return None
-
-    def batch_get(self, keys: Set[K], params: Optional[GetParams] = None) -> Dict[K, V]:
-        results = {}
-        for k in keys:
-            val = self.get(k)
-            if val:
-                results[k] = val
-        return results
-
-    def get_range(self, start_key: K, end_key: K, params: Optional[GetParams] = None) -> List[Tuple[K, V]]:
-        pk_query = self._key_to_mongo_pk_query(start_key)
-        
-        doc = self.collection.find_one(pk_query)
-        if not doc or "items" not in doc:
-             return []
-        
-        start_sk = self._get_sort_key_value(start_key)
-        end_sk = self._get_sort_key_value(end_key)
-        
-        items = []
-        for item in doc["items"]:
-            sk = item["sk"]
-            
-            # Simple comparison for now. 
-            # Note: This assumes sk structure is comparable and consistent with range queries.
-            # Dict comparison in Python is okay if keys match order.
-            match = False
-            try:
-                if start_sk <= sk <= end_sk:
-                    match = True
-            except TypeError:
-                # Fallback or error if types differ
-                pass
-                
-            if match:
-                 try:
-                     # Reconstruct Full Key
-                     # Assuming Key construction takes ALL fields in order (PK then SK)
-                     
-                     pk_tuple = self._get_partition_key_tuple(start_key)
-                     
-                     if isinstance(sk, dict) and "v" in sk and isinstance(sk["v"], list):
-                         sk_tuple = tuple(sk["v"])
-                     elif isinstance(sk, dict):
-                         if self._sort_attrs:
-                             sk_tuple = tuple(sk.get(a) for a in self._sort_attrs)
-                         else:
-                             sk_tuple = tuple(sk.values())
-                     elif isinstance(sk, list):
-                         sk_tuple = tuple(sk)
-                     else:
-                         sk_tuple = (sk,)
-                         
-                     full_tuple = pk_tuple + sk_tuple
-                     
-                     k = self._reconstruct_key(full_tuple)
-                     items.append((k, self._from_data_dict(item["d"], k)))
-                 except Exception:
-                     continue
-        
-        # Sort in memory
-        try:
-             # Sort by the key object itself if comparable, or try to sort by SK value?
-             # If K is a dataclass(frozen=True), it is orderable if order=True.
-             # We assume K is orderable.
-             items.sort(key=lambda x: x[0], reverse=params.reverse if params else False) # type: ignore
-        except Exception:
-             pass
-
-        return items
-
-    def get_range_iterator(self, start_key: K, end_key: K, params: Optional[GetParams] = None):
-        items = self.get_range(start_key, end_key, params)
-        for item in items:
-            yield item
+    def _items_projection(self, idx_attrs: List[str], data_fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        # The index attributes are always fetched, since matching items are picked out in memory
+        if not data_fields:
+            return None
+        return {f"items.d.{attr}": 1 for attr in dict.fromkeys([*idx_attrs, *data_fields])}
 
-    def get_by_index(self, index_key: Any, params: Optional[GetParams] = None) -> List[V]:
+    def get_by_index(self, index_key: Any, params: Optional[GetParams] = None,
+                     data_fields: Optional[List[str]] = None) -> List[V]:
+        """
+        If data_fields is given, only those data fields (plus the index fields) are
+        fetched and the items are returned as data dicts.
+        """
+        self._ensure_index(type(index_key))
         idx_attrs, _, _ = self._discover_attrs_for(type(index_key))
         vals = self._get_key_tuple(index_key, idx_attrs)
         
@@ -810,7 +1020,7 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
         for i, attr in enumerate(idx_attrs):
             query[f"items.d.{attr}"] = vals[i]
             
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, self._items_projection(idx_attrs, data_fields))
         
         results = []
         for doc in cursor:
@@ -824,10 +1034,16 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
                             match = False
                             break
                     if match:
-                        results.append(self._from_data_dict(data, None))
+                        results.append(data if data_fields else self._from_data_dict(data, None))
         return results
 
-    def get_by_index_range(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None) -> List[V]:
+    def get_by_index_range(self, start_index: Any, end_index: Any, params: Optional[GetParams] = None,
+                           data_fields: Optional[List[str]] = None) -> List[V]:
+        """
+        If data_fields is given, only those data fields (plus the index fields) are
+        fetched and the items are returned as data dicts.
+        """
+        self._ensure_index(type(start_index))
         idx_attrs, _, _ = self._discover_attrs_for(type(start_index))
         s_vals = self._get_key_tuple(start_index, idx_attrs)
         e_vals = self._get_key_tuple(end_index, idx_attrs)
@@ -842,7 +1058,7 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
                  "$lte": e_vals[0]
              }
         
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, self._items_projection(idx_attrs, data_fields))
         
         results = []
         for doc in cursor:
@@ -853,7 +1069,7 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
                     obj_vals = tuple(data.get(a) for a in idx_attrs)
                     
                     if s_vals <= obj_vals <= e_vals:
-                         results.append((obj_vals, self._from_data_dict(data, None)))
+                         results.append((obj_vals, data if data_fields else self._from_data_dict(data, None)))
 
         # Sort by index tuple
         results.sort(key=lambda x: x[0], reverse=params.reverse if params else False) # type: ignore
@@ -865,9 +1081,25 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
             yield item
 
     def batch_put(self, items: Dict[K, V], params: Optional[PutParams] = None):
-        # Naive implementation loop
+        from pymongo import UpdateOne
+        # Group items by partition document: pull any existing items with the
+        # same sort keys, then push the new ones, all in one round trip
+        partitions: Dict[Tuple, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
         for k, v in items.items():
-            self.put(k, v, params)
+            pk_query = self._key_to_mongo_pk_query(k)
+            pk_vals = self._get_partition_key_tuple(k)
+            if pk_vals not in partitions:
+                partitions[pk_vals] = (pk_query, [])
+            partitions[pk_vals][1].append({"sk": self._get_sort_key_value(k), "d": self._to_data_dict(v)})
+
+        operations = []
+        for pk_query, new_items in partitions.values():
+            sort_keys = [item["sk"] for item in new_items]
+            operations.append(UpdateOne(pk_query, {"$pull": {"items": {"sk": {"$in": sort_keys}}}}))
+            operations.append(UpdateOne(pk_query, {"$push": {"items": {"$each": new_items}}}, upsert=True))
+        if operations:
+            # Ordered, so each pull is applied before its push
+            self.collection.bulk_write(operations, ordered=True)
 
     def get(self, key: K, params: Optional[GetParams] = None) -> Optional[V]:
         pk_query = self._key_to_mongo_pk_query(key)
@@ -883,7 +1115,7 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
             return self._from_data_dict(doc["items"][0]["d"], key)
         return None
 
-    def batch_get(self, keys: Set[K], params: Optional[GetParams] = None) -> Dict[K, V]:
+    def batch_get(self, keys: Iterable[K], params: Optional[GetParams] = None) -> Dict[K, V]:
         results = {}
         for k in keys:
             val = self.get(k)
@@ -989,6 +1221,23 @@ class MongoEmbeddedDocumentStore(DocumentStore[K, V]):
         if self.collection_name not in self.db.list_collection_names():
             self.db.create_collection(self.collection_name)
 
+    def _index_spec(self, index_type: type) -> List[Tuple[str, int]]:
+        # Documents are looked up by partition key through _id and sort key ranges
+        # are filtered within a document, so only item data fields need an index.
+        # The index is multikey: it points at documents holding a matching item.
+        attrs, _, _ = self._discover_attrs_for(index_type)
+        return [(f"items.d.{a}", 1) for a in attrs]
+
+    def create_index(self, index_type: type, covered_fields: Optional[List[str]] = None):
+        # Multikey indexes can't cover queries, so covered_fields has no use here
+        self.collection.create_index(self._index_spec(index_type))
+        self._indexed_types.add(index_type)
+
+    def _ensure_index(self, index_type: type):
+        # Index lookups create their index on first use
+        if index_type not in self._indexed_types:
+            self.create_index(index_type)
+
     def drop_table(self):
         self.collection.drop()
 
@@ -1,35 +1,55 @@
 import os
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Union, BinaryIO, Iterable, List, Tuple
 import time
+import shutil
 
 class ShelfImageStorage(ABC):
     @abstractmethod
-    def save_image(self, user_id: str, frame_id: str, image_bytes: bytes) -> str:
+    def save_image(self, user_id: str, frame_id: str, image_bytes: Union[bytes, BinaryIO]) -> str:
         """
         Saves the image and returns a path or URL.
+        image_bytes may also be a binary file-like object, which is streamed from its current position.
         """
         pass
 
+    def save_images_batch(self, user_id: str, images: Iterable[Tuple[str, Union[bytes, BinaryIO]]]) -> List[str]:
+        """
+        Saves (frame_id, image_bytes) pairs for one user and returns their paths or URLs in order.
+        """
+        return [self.save_image(user_id, frame_id, image_bytes) for frame_id, image_bytes in images]
+
 class FileShelfImageStorage(ShelfImageStorage):
     def __init__(self, base_path: str = "shelf_images"):
         self.base_path = base_path
         if not os.path.exists(base_path):
             os.makedirs(base_path)
 
-    def save_image(self, user_id: str, frame_id: str, image_bytes: bytes) -> str:
+    def _user_dir(self, user_id: str) -> str:
         user_dir = os.path.join(self.base_path, user_id)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        
+        os.makedirs(user_dir, exist_ok=True)
+        return user_dir
+
+    def _write_image(self, user_dir: str, frame_id: str, image_bytes: Union[bytes, BinaryIO]) -> str:
         filename = f"{frame_id}.jpg"
         file_path = os.path.join(user_dir, filename)
         
         with open(file_path, "wb") as f:
-            f.write(image_bytes)
+            if isinstance(image_bytes, bytes):
+                f.write(image_bytes)
+            else:
+                shutil.copyfileobj(image_bytes, f)
             
         return file_path
 
+    def save_image(self, user_id: str, frame_id: str, image_bytes: Union[bytes, BinaryIO]) -> str:
+        return self._write_image(self._user_dir(user_id), frame_id, image_bytes)
+
+    def save_images_batch(self, user_id: str, images: Iterable[Tuple[str, Union[bytes, BinaryIO]]]) -> List[str]:
+        # The user directory is created once for the whole batch
+        user_dir = self._user_dir(user_id)
+        return [self._write_image(user_dir, frame_id, image_bytes) for frame_id, image_bytes in images]
+
 class GCSShelfImageStorage(ShelfImageStorage):
     def __init__(self, bucket_name: str):
         self.bucket_name = bucket_name
@@ -42,13 +62,16 @@ class GCSShelfImageStorage(ShelfImageStorage):
             self.client = None
             self.bucket = None
 
-    def save_image(self, user_id: str, frame_id: str, image_bytes: bytes) -> str:
+    def save_image(self, user_id: str, frame_id: str, image_bytes: Union[bytes, BinaryIO]) -> str:
         if not self.bucket:
             raise RuntimeError("GCS Storage not initialized (missing dependencies or bucket)")
 
         blob_path = f"{user_id}/{frame_id}.jpg"
         blob = self.bucket.blob(blob_path)
-        blob.upload_from_string(image_bytes, content_type="image/jpeg")
+        if isinstance(image_bytes, bytes):
+            blob.upload_from_string(image_bytes, content_type="image/jpeg")
+        else:
+            blob.upload_from_file(image_bytes, content_type="image/jpeg")
         
         return f"gs://{self.bucket_name}/{blob_path}"
 
@@ -3,11 +3,18 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional, Annotated
+from typing import Dict, Any, List, Optional, Annotated, Tuple
 import os
 import uuid
 import time
 import os
+import json
+import hashlib
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, auth
@@ -18,8 +25,8 @@ from book_enricher import BookEnricher
 from deduplicator import BookDeduplicator
 from session_manager import get_session_store
 from image_storage import get_image_storage
-from document_store import MongoDocumentStore, InMemoryDocumentStore, PartitionKey, SortKey, default_to_dict as to_dict
-from pymongo import MongoClient
+from document_store import AsyncMongoDocumentStore, InMemoryDocumentStore, PartitionKey, SortKey, GetParams, default_to_dict as to_dict
+from motor.motor_asyncio import AsyncIOMotorClient
 from google.cloud import secretmanager
 
 load_dotenv()
@@ -30,6 +37,43 @@ load_dotenv()
 
 project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
 
+# Secret Manager client and fetched secret payloads, shared across lookups
+_secret_client: Optional[secretmanager.SecretManagerServiceClient] = None
+_secret_cache: Dict[str, str] = {}
+_secret_client_lock = threading.Lock()
+
+def _get_secret_client() -> secretmanager.SecretManagerServiceClient:
+    global _secret_client
+    with _secret_client_lock:
+        if _secret_client is None:
+            _secret_client = secretmanager.SecretManagerServiceClient()
+    return _secret_client
+
+def _fetch_secret(secret_name: str) -> Optional[str]:
+    """
+    Fetches the latest version of a secret from GCP Secret Manager.
+    Successful fetches are cached for the lifetime of the process.
+    """
+    if secret_name in _secret_cache:
+        return _secret_cache[secret_name]
+
+    try:
+        if not project_id:
+            print(f"Warning: Cannot fetch secret '{secret_name}' - no project_id provided and GOOGLE_CLOUD_PROJECT not set")
+            return None
+
+        secret_path = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
+        response = _get_secret_client().access_secret_version(request={"name": secret_path})
+        value = response.payload.data.decode("UTF-8")
+        _secret_cache[secret_name] = value
+
+        print("Using secret manager for ", secret_name)
+
+        return value
+    except Exception as e:
+        print(f"Warning: Failed to fetch secret '{secret_name}' from GCP Secret Manager: {e}")
+        return None
+
 def get_config_value(env_var_name: str, secret_name: str) -> Optional[str]:
     """
     Get configuration value from environment variable or GCP Secret Manager.
@@ -38,7 +82,6 @@ def get_config_value(env_var_name: str, secret_name: str) -> Optional[str]:
     Args:
         env_var_name: Name of the environment variable to check first
         secret_name: Name of the secret in GCP Secret Manager
-        project_id: GCP project ID (defaults to GOOGLE_CLOUD_PROJECT env var)
     
     Returns:
         The configuration value or None if not found
@@ -49,52 +92,68 @@ def get_config_value(env_var_name: str, secret_name: str) -> Optional[str]:
         return value
     
     # Fall back to GCP Secret Manager
-    try:
-        if not project_id:
-            print(f"Warning: Cannot fetch secret '{secret_name}' - no project_id provided and GOOGLE_CLOUD_PROJECT not set")
-            return None
-
-        client = secretmanager.SecretManagerServiceClient()
-        secret_path = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-        response = client.access_secret_version(request={"name": secret_path})
-        value = response.payload.data.decode("UTF-8")
-        
+    value = _fetch_secret(secret_name)
+    if value:
         # Cache the value in environment variable for future calls
         os.environ[env_var_name] = value
-        
-        print("Using secret manager for ", secret_name)
-        
-        return value
-    except Exception as e:
-        print(f"Warning: Failed to fetch secret '{secret_name}' from GCP Secret Manager: {e}")
-        return None
+    return value
+
+def preload_config_values(names: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Resolves several config values concurrently.
+    
+    Args:
+        names: Mapping of environment variable name -> secret name
+    
+    Returns:
+        Mapping of environment variable name -> value (None if not found)
+    """
+    with ThreadPoolExecutor(max_workers=max(len(names), 1)) as executor:
+        futures = {env_var_name: executor.submit(get_config_value, env_var_name, secret_name)
+                   for env_var_name, secret_name in names.items()}
+        return {env_var_name: future.result() for env_var_name, future in futures.items()}
 
 test_user = os.environ.get("TEST_USER")
 
-# Initialize Firebase Admin
+# Fetch startup secrets in parallel instead of one Secret Manager round trip after another
+config_names = {
+    "GOOGLE_API_KEY": "google-api-key",
+    "MONGODB_CONNECTION": "mongodb-connection",
+}
 if not firebase_admin._apps and not test_user:
-    try:
-        # 1. Try to load from FIREBASE_SERVICE_ACCOUNT_JSON env var (for Cloud Run)
-        service_account_json = get_config_value("FIREBASE_SERVICE_ACCOUNT_JSON", "firebase-service-account")
-        if service_account_json:
-            import json
-            cert = json.loads(service_account_json)
-            cred = credentials.Certificate(cert)
-            firebase_admin.initialize_app(cred)
-            print("Initialized Firebase Admin using FIREBASE_SERVICE_ACCOUNT_JSON env var")
-        else:
-            # 2. Fallback to implicit credentials (GOOGLE_APPLICATION_CREDENTIALS) or default
-            cred = credentials.ApplicationDefault()
-            firebase_admin.initialize_app(cred)
-            print("Initialized Firebase Admin using Application Default Credentials")
-    except Exception as e:
-        print(f"Warning: Firebase Admin initialization failed: {e}")
-        print("Auth verification may fail if credentials are not set.")
-
-# Get the API key for gemini
-get_config_value("GOOGLE_API_KEY", "google-api-key")
-
-app = FastAPI(title="Book spine extractor API")
+    config_names["FIREBASE_SERVICE_ACCOUNT_JSON"] = "firebase-service-account"
+config = preload_config_values(config_names)
+
+def setup_firebase():
+    """Initializes Firebase Admin, unless already initialized or running with a test user."""
+    if not firebase_admin._apps and not test_user:
+        try:
+            # 1. Try to load from FIREBASE_SERVICE_ACCOUNT_JSON env var (for Cloud Run)
+            service_account_json = config["FIREBASE_SERVICE_ACCOUNT_JSON"]
+            if service_account_json:
+                cert = json.loads(service_account_json)
+                cred = credentials.Certificate(cert)
+                firebase_admin.initialize_app(cred)
+                print("Initialized Firebase Admin using FIREBASE_SERVICE_ACCOUNT_JSON env var")
+            else:
+                # 2. Fallback to implicit credentials (GOOGLE_APPLICATION_CREDENTIALS) or default
+                cred = credentials.ApplicationDefault()
+                firebase_admin.initialize_app(cred)
+                print("Initialized Firebase Admin using Application Default Credentials")
+        except Exception as e:
+            print(f"Warning: Firebase Admin initialization failed: {e}")
+            print("Auth verification may fail if credentials are not set.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Firebase and Mongo setup don't depend on each other, so run them concurrently
+    await asyncio.gather(asyncio.to_thread(setup_firebase), create_tables())
+    await start_firebase_certs_refresher()
+    yield
+    await stop_firebase_certs_refresher()
+    await close_enricher()
+
+app = FastAPI(title="Book spine extractor API", lifespan=lifespan)
 
 # Initialize session store
 session_store = get_session_store("memory")
@@ -104,53 +163,67 @@ image_storage = get_image_storage("file" if os.getenv("GOOGLE_API_KEY") else "gc
 
 # Initialize document stores
 # Use environment variables if available
-mongo_conn = get_config_value("MONGODB_CONNECTION", "mongodb-connection")
-mongo_client = MongoClient(mongo_conn)
-
-user_uploads_store = MongoDocumentStore[UserFrameUploadKey, UserFrameUploadEntry](
-    client=mongo_client,
+mongo_conn = config["MONGODB_CONNECTION"]
+# Keep warm sockets in the pool so the first requests don't pay connection setup
+mongo_pool_options = {
+    "maxPoolSize": 50,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 60000,
+    "serverSelectionTimeoutMS": 5000,
+    "retryWrites": True,
+}
+# Single async client shared by all document stores
+async_mongo_client = AsyncIOMotorClient(mongo_conn, **mongo_pool_options)
+
+user_uploads_store = AsyncMongoDocumentStore[UserFrameUploadKey, UserFrameUploadEntry](
+    client=async_mongo_client,
     database_name="social_lib",
     collection_name="user_uploads",
     key_type=UserFrameUploadKey,
     data_type=UserFrameUploadEntry
 )
 
-user_books_store = MongoDocumentStore[UserLibraryBookKey, UserLibraryBook](
-    client=mongo_client,
+user_books_store = AsyncMongoDocumentStore[UserLibraryBookKey, UserLibraryBook](
+    client=async_mongo_client,
     database_name="social_lib",
     collection_name="user_books",
     key_type=UserLibraryBookKey,
     data_type=UserLibraryBook
 )
 
-user_shelf_frame_metadata_store = MongoDocumentStore[UserShelfFrameMetadataKey, UserShelfFrameMetadata](
-    client=mongo_client,
+user_shelf_frame_metadata_store = AsyncMongoDocumentStore[UserShelfFrameMetadataKey, UserShelfFrameMetadata](
+    client=async_mongo_client,
     database_name="social_lib",
     collection_name="user_shelf_frame_metadata",
     key_type=UserShelfFrameMetadataKey,
     data_type=UserShelfFrameMetadata
 )
 
-user_library_store = MongoDocumentStore[UserLibraryKey, UserLibrary](
-    client=mongo_client,
+user_library_store = AsyncMongoDocumentStore[UserLibraryKey, UserLibrary](
+    client=async_mongo_client,
     database_name="social_lib",
     collection_name="user_library",
     key_type=UserLibraryKey,
     data_type=UserLibrary
 )
-user_shelf_store = MongoDocumentStore[UserShelfKey, UserShelf](
-    client=mongo_client,
+user_shelf_store = AsyncMongoDocumentStore[UserShelfKey, UserShelf](
+    client=async_mongo_client,
     database_name="social_lib",
     collection_name="user_shelf",
     key_type=UserShelfKey,
     data_type=UserShelf
 )
 
-user_uploads_store.create_table()
-user_library_store.create_table()
-user_shelf_frame_metadata_store.create_table()
-user_library_store.create_table()
-user_shelf_store.create_table()
+async def create_tables():
+    # Forces the async pool to connect before the first user request
+    await async_mongo_client.admin.command("ping")
+    await asyncio.gather(
+        user_uploads_store.create_table(),
+        user_books_store.create_table(),
+        user_shelf_frame_metadata_store.create_table(),
+        user_library_store.create_table(),
+        user_shelf_store.create_table(),
+    )
 
 # Add CORS middleware
 app.add_middleware(
@@ -163,15 +236,82 @@ app.add_middleware(
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    if test_user:
-        return {"uid": test_user}
+_enricher: Optional[BookEnricher] = None
+
+def get_enricher() -> BookEnricher:
+    """Returns the process-wide BookEnricher, creating it on first use."""
+    global _enricher
+    if _enricher is None:
+        _enricher = BookEnricher()
+    return _enricher
+
+async def close_enricher():
+    if _enricher is not None:
+        await _enricher.aclose()
+
+# Decoded claims of recently verified tokens, keyed by token hash (LRU order)
+_verified_tokens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_VERIFIED_TOKENS_MAX = 4096
+
+def _get_cached_claims(token_hash: str) -> Optional[Dict[str, Any]]:
+    claims = _verified_tokens.get(token_hash)
+    if claims is None:
+        return None
+    if claims.get("exp", 0) <= time.time():
+        del _verified_tokens[token_hash]
+        return None
+    _verified_tokens.move_to_end(token_hash)
+    return claims
+
+def _cache_claims(token_hash: str, claims: Dict[str, Any]):
+    _verified_tokens[token_hash] = claims
+    _verified_tokens.move_to_end(token_hash)
+    if len(_verified_tokens) > _VERIFIED_TOKENS_MAX:
+        _verified_tokens.popitem(last=False)
+
+_FIREBASE_CERTS_REFRESH_SECONDS = 30 * 60
+_firebase_certs_task: Optional[asyncio.Task] = None
+
+def _refresh_firebase_certs():
+    """
+    Fetches Google's ID token signing certificates through the same cache-controlled
+    session firebase_admin verifies with, so request-time verification finds them cached.
+    Only goes to the network once the cached copy has gone stale.
+    Relies on private firebase_admin attributes, which is why requirements.txt pins
+    firebase-admin to the version this was written against (7.7.0).
+    """
+    verifier = auth._get_client(None)._token_verifier
+    verifier.request(url=verifier.id_token_verifier.cert_url)
+
+async def _refresh_firebase_certs_loop():
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_firebase_certs)
+        except Exception as e:
+            print(f"Failed to refresh Firebase certificates: {e}")
+        await asyncio.sleep(_FIREBASE_CERTS_REFRESH_SECONDS)
+
+async def start_firebase_certs_refresher():
+    global _firebase_certs_task
+    if test_user or not firebase_admin._apps:
+        return
+    _firebase_certs_task = asyncio.create_task(_refresh_firebase_certs_loop())
+
+async def stop_firebase_certs_refresher():
+    if _firebase_certs_task is not None:
+        _firebase_certs_task.cancel()
+
+async def _verify_token(token: str) -> Dict[str, Any]:
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = _get_cached_claims(token_hash)
+    if claims is not None:
+        return claims
 
-    token = credentials.credentials
     try:
-        # Verify the Firebase token
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token
+        # Verify the Firebase token off the event loop
+        claims = await asyncio.to_thread(auth.verify_id_token, token)
+        _cache_claims(token_hash, claims)
+        return claims
     except Exception as e:
         print(f"Auth Error: {e}") # DEBUG LOG
         raise HTTPException(
@@ -180,7 +320,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-@dataclass(frozen=True)
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    if test_user:
+        return {"uid": test_user}
+
+    return await _verify_token(credentials.credentials)
+
+@dataclass(frozen=True, slots=True)
 class UserKey:
     uid: Annotated[str, PartitionKey]
 
@@ -288,35 +434,40 @@ async def read_users_me(current_user: Dict[str, Any] = Depends(get_current_user)
         created_at=user.created_at
     )
 
+def _library_id_for_name(library: str) -> str:
+    """Derives a stable library_id from the library name so it can be looked up by key."""
+    if library == "My Library":
+        return "my_library"
+    return hashlib.sha1(library.encode("utf-8")).hexdigest()[:16]
+
 @app.get("/init_upload")
 @app.post("/init_upload")
 async def init_upload(current_user: Dict[str, Any] = Depends(get_current_user), library: Optional[str] = "My Library"):
     """ 
     First find the library or create a new one
     """
-    libraries = user_library_store.get_range(
-        UserLibraryKey(current_user["uid"], ""), 
-        UserLibraryKey(current_user["uid"], "\uffff"))
-    library_id = None
-    for lib in libraries:
-        if lib[1].name == library:
-            library_id = lib[0].library_id
-            break
-    if not library_id:
-        id = ""
-        if library == "My Library":
-            id = "my_library"
+    uid = current_user["uid"]
+    library_id = _library_id_for_name(library)
+    key = UserLibraryKey(uid, library_id)
+    lib = await user_library_store.get(key)
+    if lib:
+        library_id = lib.alias_of or library_id
+    else:
+        # Libraries created before ids were derived from the name have random ids
+        libraries = await user_library_store.get_range(UserLibraryKey(uid, ""), UserLibraryKey(uid, "\uffff"))
+        legacy = next((l for _, l in libraries if l.name == library and not l.alias_of), None)
+        if legacy:
+            # Record the legacy id under the derived key so the next lookup is a single get
+            library_id = legacy.key.library_id
+            await user_library_store.put(key, UserLibrary(key=key, name=library, created_at=legacy.created_at, alias_of=library_id))
         else:
-            id = str(uuid.uuid4())
-        key = UserLibraryKey(current_user["uid"], id)
-        user_library_store.put(key, UserLibrary(key=key, name=library, created_at=time.time()))
-        library_id = id
+            await user_library_store.put(key, UserLibrary(key=key, name=library, created_at=time.time()))
 
     """
     Initializes a new upload session.
     """
     session_id = str(uuid.uuid4())
-    session_store.create_session(session_id, {"library_id": library_id}, ttl_seconds=3600)
+    session_store.create_session(session_id, {"library_id": library_id, "frame_ids": []}, ttl_seconds=3600)
     return {"status": "success", "session_id": session_id, "library_id": library_id}
 
 @app.post("/upload_frame")
@@ -346,22 +497,30 @@ async def upload_frame(
     if frame_id is None:
         frame_id = time.time_ns() // 1_000_000
     
-    # 0.5 Save the frame image
-    image_path = image_storage.save_image(user_id, f"{session_id}_{frame_id}", content)
+    # 0.5 Save the frame image in the background, it doesn't depend on the extraction
+    save_task = asyncio.create_task(
+        asyncio.to_thread(image_storage.save_image, user_id, f"{session_id}_{frame_id}", content)
+    )
     
     # 1. Process the image using Gemini to extract raw books
-    result = await process_image_bytes(image_bytes=content, vertexai=True, project=project_id)
+    try:
+        result = await process_image_bytes(image_bytes=content, vertexai=True, project=project_id)
+    except BaseException:
+        # Don't leave the save task orphaned with an unretrieved result
+        save_task.cancel()
+        await asyncio.gather(save_task, return_exceptions=True)
+        raise
+    image_path = await save_task
     raw_books = result.get("books", [])
 
     # 2. Immediately enrich and deduplicate (counting mode)
     if raw_books:
-        enricher = BookEnricher()
+        enricher = get_enricher()
         enriched_books, stats = await enricher.batch_enrich(raw_books, dedupe_mode="counting")
         
         # 2.5 Save to raw library document store
         entry_key = UserFrameUploadKey(user_id, session_id, frame_id)
         entry = UserFrameUploadEntry(entry_key, shelf, library_id, enriched_books)
-        user_uploads_store.put(entry_key, entry)
         
         # 2.6 Save shelf frame metadata
         meta_key = UserShelfFrameMetadataKey(user_id, library_id, frame_id)
@@ -371,7 +530,10 @@ async def upload_frame(
             book_count=len(enriched_books),
             uploaded_at=time.time()
         )
-        user_shelf_frame_metadata_store.put(meta_key, metadata)
+        await asyncio.gather(
+            user_uploads_store.put(entry_key, entry),
+            user_shelf_frame_metadata_store.put(meta_key, metadata)
+        )
 
         response_data = {
             "status": "success",
@@ -387,6 +549,7 @@ async def upload_frame(
         if session:
             print(f"Saving to session: {session_id}, frame_id: {frame_id}")
             session_store.put(session_id, f"books_{frame_id}", response_data)
+            session_store.put_array_item(session_id, "frame_ids", -1, frame_id)
             response_data["session_id"] = session_id
             
         return response_data
@@ -407,7 +570,7 @@ async def complete_upload(
     user_id = current_user["uid"]
 
     # If results are not provided, try to fetch from session
-    (results, library_id) = _get_uploaded_frames(user_id, request.session_id, request.shelf, results)
+    (results, library_id) = await _get_uploaded_frames(user_id, request.session_id, request.shelf, results)
     if not results:
         return {"status": "error", "message": "No results provided and no session found"}
         
@@ -425,47 +588,31 @@ async def complete_upload(
     frame_to_shelf = {res.get("frame_id"): res.get("shelf") for res in results}
 
     deduped_books = BookDeduplicator.deduplicate_proximity(all_books_to_dedupe)
-    for book in deduped_books:
-        shelves = list({frame_to_shelf.get(frame_id) for frame_id in book["frame_ids"]})
-        book["shelves"] = shelves
-
     deduped_count = len(all_books_to_dedupe) - len(deduped_books)
 
     books_by_shelf: Dict[str, List[Dict[str, Any]]] = {}
     unshelved_books: List[Dict[str, Any]] = []
 
-    # Group books by shelf
+    # Resolve each book's shelves and group books by shelf in a single pass.
+    # A book gets a LibraryBook entry for EACH unique shelf it was seen on.
     for book in deduped_books:
-        # Determine shelf for this book
-        # Current logic: Book has `frame_ids` list.
-        # We'll create a LibraryBook entry for EACH unique shelf it belongs to.
-        
-        book_frame_ids = book.get("frame_ids", [])
-        if not book_frame_ids:
-            unshelved_books.append(book)
-            continue
-            
-        shelves_for_book = set()
-        for fid in book_frame_ids:
-            shelf = frame_to_shelf.get(fid)
-            if shelf:
-                shelves_for_book.add(shelf)
-        
+        shelves_for_book = {frame_to_shelf.get(fid) for fid in book.get("frame_ids", [])} - {None, ""}
+        book["shelves"] = list(shelves_for_book)
         if not shelves_for_book:
             unshelved_books.append(book)
         else:
             for shelf in shelves_for_book:
-                if shelf not in books_by_shelf:
-                    books_by_shelf[shelf] = []
-                books_by_shelf[shelf].append(book)
+                books_by_shelf.setdefault(shelf, []).append(book)
 
     # For each affected shelf: Delete old content and Insert new
-    for shelf, shelf_books in books_by_shelf.items():        
+    # Shelves are independent, so their writes run concurrently
+    shelf_writes = [
         _store_books_to_library(user_id, library_id, shelf, shelf_books)
-            
+        for shelf, shelf_books in books_by_shelf.items()
+    ]
     if unshelved_books:
-        shelf = "Unshelved" 
-        _store_books_to_library(user_id, library_id, shelf, unshelved_books)
+        shelf_writes.append(_store_books_to_library(user_id, library_id, "Unshelved", unshelved_books))
+    await asyncio.gather(*shelf_writes)
 
     # Cleanup session if it was used
     if request.session_id:
@@ -481,7 +628,7 @@ async def complete_upload(
         }
     }
 
-def _get_uploaded_frames(
+async def _get_uploaded_frames(
     user_id: str, session_id: Optional[str], shelf: Optional[str], results: Optional[List[Dict[str, Any]]]
     ):
     # If results are not provided, try to fetch from session
@@ -490,77 +637,72 @@ def _get_uploaded_frames(
         if full_session:        
             library_id = full_session.get("library_id")
             
-            # Aggregate all frame results (keys starting with books_)
-            # Sort keys numerically based on the frame_id suffix
-            frame_keys = [k for k in full_session.keys() if k.startswith("books_")]
-            
-            def get_frame_num(k):
-                try:
-                    return int(k.split("_")[1])
-                except (IndexError, ValueError):
-                    return 0
-            
-            frame_keys.sort(key=get_frame_num)
-            results = [full_session[k] for k in frame_keys if not shelf or full_session[k]["shelf"] == shelf]
+            # Aggregate all frame results, ordered by frame_id
+            # (a frame may have been uploaded more than once)
+            frame_ids = full_session.get("frame_ids")
+            if frame_ids is None:
+                # Sessions created before frame_ids was tracked only have the books_<id> keys
+                frame_ids = [int(k[len("books_"):]) for k in full_session if k.startswith("books_") and k[len("books_"):].isdigit()]
+            frame_ids = sorted(set(frame_ids))
+            frames = [full_session[f"books_{fid}"] for fid in frame_ids]
+            results = [f for f in frames if not shelf or f["shelf"] == shelf]
         
         # Reconstruct library from uploads table
         else:
-            frames = user_uploads_store.get_range(
+            # Shelf filtering is done by Mongo so non-matching frames are never transferred
+            frames = await user_uploads_store.get_range_filtered(
                 UserFrameUploadKey(user_id, session_id, 0),
-                UserFrameUploadKey(user_id, session_id, time.time_ns() // 1_000_000)
+                UserFrameUploadKey(user_id, session_id, time.time_ns() // 1_000_000),
+                {"shelf": shelf} if shelf else {},
+                params=GetParams(batch_size=200)
             )
             results = []
             if frames and len(frames) > 0:
                 library_id = frames[0][1].library_id
                 for frame in frames:
                     f = frame[1]
-                    if not shelf or f.shelf == shelf:
-                        f.frame_id = frame[0].frame_id
-                        results.append(to_dict(f))
+                    f.frame_id = frame[0].frame_id
+                    results.append(to_dict(f))
 
     if not results:
         return None
 
     return results, library_id
 
-def _store_books_to_library(user_id: str, library_id: str, shelf: str, books: List[Dict[str, Any]]):
+async def _store_books_to_library(user_id: str, library_id: str, shelf: str, books: List[Dict[str, Any]]):
     print(f"Saving book shelf: {shelf} with {len(books)} books")
 
-    # Delete range for (user_id, library, shelf)
-    # We need a way to specify partial sort key for range delete?
-    # DocumentStore.delete_range(start, end)
-    # start = (user_id, library, shelf, "")
-    # end = (user_id, library, shelf, "\uffff")
-    del_start = UserLibraryBookKey(user_id, library_id, shelf, "")
-    del_end = UserLibraryBookKey(user_id, library_id, shelf, "\uffff")
-    user_books_store.delete_range(del_start, del_end)
-
+    lib_books: Dict[UserLibraryBookKey, UserLibraryBook] = {}
     for book in books:
         book_id = book.get("isbn")
         if not book_id:
             title = book.get("title", "").lower().strip()
             author = book.get("author", "").lower().strip()
             book_id = f"{title}|{author}"
-            
-            lib_key = UserLibraryBookKey(user_id, library_id, shelf, book_id)
-            lib_book = UserLibraryBook(
-                key=lib_key,
-                title=book.get("title", "Unknown"),
-                author=book.get("author"),
-                isbn=book.get("isbn"),
-                subjects=book.get("subjects", []),
-                description=book.get("description"),
-                frame_ids=book.get("frame_ids", []),
-                copies=book.get("count")
-            )
-            user_books_store.put(lib_key, lib_book)
+
+        lib_key = UserLibraryBookKey(user_id, library_id, shelf, book_id)
+        lib_books[lib_key] = UserLibraryBook(
+            key=lib_key,
+            title=book.get("title", "Unknown"),
+            author=book.get("author"),
+            isbn=book.get("isbn"),
+            subjects=book.get("subjects", []),
+            description=book.get("description"),
+            frame_ids=book.get("frame_ids", []),
+            copies=book.get("count")
+        )
+
+    # Replace the (user_id, library, shelf) range in a single bulk write
+    del_start = UserLibraryBookKey(user_id, library_id, shelf, "")
+    del_end = UserLibraryBookKey(user_id, library_id, shelf, "\uffff")
+    await user_books_store.replace_range(del_start, del_end, lib_books)
 
 @app.post("/enrich_book")
 async def enrich_book(book: Dict[str, Any]):
     """
     Receives a single book's metadata and returns enriched metadata and diagnostics.
     """
-    enricher = BookEnricher()
+    enricher = get_enricher()
     enriched, diagnostics = await enricher.enrich_book(book)
     return {
         "book": enriched,
@@ -572,7 +714,7 @@ async def enrich_books(books: List[Dict[str, Any]]):
     """
     Receives a list of book metadata and returns enriched results and batch diagnostics.
     """
-    enricher = BookEnricher()
+    enricher = get_enricher()
     enriched, stats = await enricher.batch_enrich(books)
     return {
         "books": enriched,
@@ -587,16 +729,21 @@ async def get_user_libraries(current_user: Dict[str, Any] = Depends(get_current_
     """
     user_id = current_user["uid"]
     # 1. Fetch all shelf metadata for user
-    lib_rows = user_library_store.get_range(UserLibraryKey(user_id, ""), UserLibraryKey(user_id, "\uffff"))
+    lib_rows = await user_library_store.get_range(UserLibraryKey(user_id, ""), UserLibraryKey(user_id, "\uffff"))
     
     # 2. Group books by library_id
     libraries = {}
     for _, lib in lib_rows:
+        if lib.alias_of:
+            continue
         libraries[lib.key.library_id] = {
             "name": lib.name,
         }
     return libraries
 
+# Book fields returned by /user_library
+LIBRARY_BOOK_FIELDS = ["title", "author", "isbn", "year", "cover_link", "copies"]
+
 @app.get("/user_library")
 async def get_user_library(current_user: Dict[str, Any] = Depends(get_current_user), library_id: Optional[str] = None):
     """
@@ -609,19 +756,17 @@ async def get_user_library(current_user: Dict[str, Any] = Depends(get_current_us
     b_start = UserLibraryBookKey(user_id, from_library, "", "")
     b_end = UserLibraryBookKey(user_id, to_library, "\uffff", "\uffff")
     
-    book_rows = user_books_store.get_range(b_start, b_end)
-    
-    shelves: Dict[str, List[UserLibraryBook]] = {}
-    unshelved: List[UserLibraryBook] = []
+    # Books are streamed as plain dicts with only the fields the library view shows
+    shelves: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    unshelved: List[Dict[str, Any]] = []
     
-    for id, book in book_rows:
-        s_name = id.library_id + ":" + id.shelf
-        if s_name == "Unshelved":
+    async for id, book in user_books_store.get_range_stream(b_start, b_end, data_fields=LIBRARY_BOOK_FIELDS):
+        book["library_id"] = id.library_id
+        book["shelf"] = id.shelf
+        if id.shelf == "Unshelved":
             unshelved.append(book)
         else:
-            if s_name not in shelves:
-                shelves[s_name] = []
-            shelves[s_name].append(book)
+            shelves[id.library_id + ":" + id.shelf].append(book)
 
     return {
         "status": "success",
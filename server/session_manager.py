@@ -1,6 +1,7 @@
-import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from cachetools import TLRUCache
+import time
 
 class SessionStore(ABC):
     @abstractmethod
@@ -27,39 +28,62 @@ class SessionStore(ABC):
     def put_array_item(self, session_id: str, array_item: str, index: int, value: Any):
         pass
 
-class InMemorySessionStore(SessionStore):
-    def __init__(self):
-        self._sessions: Dict[str, Dict[str, Any]] = {}
+    def put_array_items(self, session_id: str, array_item: str, items: Iterable[Tuple[int, Any]]):
+        """Applies several put_array_item (index, value) writes to the same array, in order."""
+        for index, value in items:
+            self.put_array_item(session_id, array_item, index, value)
+
+def _set_array_item(arr: List[Any], index: int, value: Any):
+    # -1 or the current length appends, an existing index is overwritten,
+    # anything else is ignored
+    if index == -1:
+        arr.append(value)
+    elif 0 <= index < len(arr):
+        arr[index] = value
+    elif index == len(arr):
+        arr.append(value)
 
-    def _is_expired(self, session_id: str) -> bool:
+class _Session:
+    __slots__ = ("object", "ttl")
+
+    def __init__(self, obj: Any, ttl: int):
+        self.object = obj
+        self.ttl = ttl
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, maxsize: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        # Each session expires ttl seconds after it was last written. Writing the
+        # entry back on every access slides the expiry (sliding window TTL), and
+        # the cache evicts expired and least recently used sessions on its own.
+        # Expiry runs on the monotonic clock so wall-clock adjustments can't expire sessions;
+        # tests can pass their own clock.
+        self._sessions: TLRUCache = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _session_id, session, now: now + session.ttl,
+            timer=clock
+        )
+
+    def _touch(self, session_id: str) -> Optional[_Session]:
+        """Returns the live session (or None) and refreshes its TTL."""
         session = self._sessions.get(session_id)
-        if not session:
-            return True
-        
-        elapsed = time.time() - session["last_access"]
-        if elapsed > session["ttl"]:
-            del self._sessions[session_id]
-            return True
-        return False
+        if session is not None:
+            self._sessions[session_id] = session
+        return session
 
     def create_session(self, session_id: str, obj: Any, ttl_seconds: int):
-        self._sessions[session_id] = {
-            "object": obj,
-            "ttl": ttl_seconds,
-            "last_access": time.time()
-        }
+        self._sessions[session_id] = _Session(obj, ttl_seconds)
 
     def update_session(self, session_id: str, obj: Any):
-        if not self._is_expired(session_id):
-            self._sessions[session_id]["object"] = obj
-            self._sessions[session_id]["last_access"] = time.time()
+        session = self._touch(session_id)
+        if session is not None:
+            session.object = obj
 
     def get_session(self, session_id: str, item: Optional[str] = None) -> Optional[Any]:
-        if self._is_expired(session_id):
+        session = self._touch(session_id)
+        if session is None:
             return None
         
-        self._sessions[session_id]["last_access"] = time.time()
-        obj = self._sessions[session_id]["object"]
+        obj = session.object
         
         if item:
             if isinstance(obj, dict):
@@ -68,62 +92,59 @@ class InMemorySessionStore(SessionStore):
         return obj
 
     def delete_session(self, session_id: str):
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+        self._sessions.pop(session_id, None)
 
     def put(self, session_id: str, item: str, value: Any):
-        if not self._is_expired(session_id):
-            obj = self._sessions[session_id]["object"]
+        session = self._touch(session_id)
+        if session is not None:
+            obj = session.object
             if not isinstance(obj, dict):
-                self._sessions[session_id]["object"] = {}
-                obj = self._sessions[session_id]["object"]
+                obj = session.object = {}
             
             obj[item] = value
-            self._sessions[session_id]["last_access"] = time.time()
 
     def put_array_item(self, session_id: str, array_item: str, index: int, value: Any):
-        if not self._is_expired(session_id):
-            obj = self._sessions[session_id]["object"]
+        session = self._touch(session_id)
+        if session is not None:
+            obj = session.object
             if not isinstance(obj, dict):
-                self._sessions[session_id]["object"] = {}
-                obj = self._sessions[session_id]["object"]
+                obj = session.object = {}
                 
             if array_item not in obj or not isinstance(obj[array_item], list):
                 obj[array_item] = []
             
-            arr = obj[array_item]
-            if index == -1:
-                arr.append(value)
-            elif 0 <= index < len(arr):
-                arr[index] = value
-            elif index == len(arr):
-                arr.append(value)
-            else:
-                # Basic handling for out of bounds if not appending
-                pass
-                
-            self._sessions[session_id]["last_access"] = time.time()
+            _set_array_item(obj[array_item], index, value)
 
 class RedisSessionStore(SessionStore):
-    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, **kwargs):
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, max_connections: int = 32, **kwargs):
         import redis
-        self.client = redis.Redis(host=host, port=port, db=db, decode_responses=False, **kwargs)
+        # The client keeps a connection pool; TCP keepalive and periodic health checks
+        # stop idle pooled connections from failing the next session request
+        kwargs.setdefault("socket_keepalive", True)
+        kwargs.setdefault("health_check_interval", 30)
+        self.client = redis.Redis(host=host, port=port, db=db, decode_responses=False,
+                                  max_connections=max_connections, **kwargs)
+
+    def close(self):
+        self.client.close()
 
     def create_session(self, session_id: str, obj: Any, ttl_seconds: int):
-        import pickle
-        self.client.delete(session_id)
-        self.client.delete(f"ttl:{session_id}")
-        
-        if isinstance(obj, dict):
-            if obj:
-                mapping = {k: pickle.dumps(v) for k, v in obj.items()}
-                self.client.hset(session_id, mapping=mapping)
-        else:
-            # If not a dict, wrap it in a default field
-            self.client.hset(session_id, "data", pickle.dumps(obj))
+        import orjson
+        # Pipelined so the whole write costs a single round trip
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(session_id, f"ttl:{session_id}")
             
-        self.client.setex(f"ttl:{session_id}", ttl_seconds, str(ttl_seconds))
-        self.client.expire(session_id, ttl_seconds)
+            if isinstance(obj, dict):
+                if obj:
+                    mapping = {k: orjson.dumps(v) for k, v in obj.items()}
+                    pipe.hset(session_id, mapping=mapping)
+            else:
+                # If not a dict, wrap it in a default field
+                pipe.hset(session_id, "data", orjson.dumps(obj))
+                
+            pipe.setex(f"ttl:{session_id}", ttl_seconds, str(ttl_seconds))
+            pipe.expire(session_id, ttl_seconds)
+            pipe.execute()
 
     def update_session(self, session_id: str, obj: Any):
         # Refresh TTL and replace the whole hash
@@ -133,58 +154,78 @@ class RedisSessionStore(SessionStore):
             self.create_session(session_id, obj, ttl_val)
 
     def get_session(self, session_id: str, item: Optional[str] = None) -> Optional[Any]:
-        import pickle
+        import orjson
         # Refresh TTL
         ttl = self.client.get(f"ttl:{session_id}")
         if not ttl:
             return None
         
         ttl_val = int(ttl)
-        self.client.expire(session_id, ttl_val)
-        self.client.expire(f"ttl:{session_id}", ttl_val)
+        with self.client.pipeline(transaction=False) as pipe:
+            self._refresh_ttl(pipe, session_id, ttl_val)
+            if item:
+                pipe.hget(session_id, item)
+            else:
+                pipe.hgetall(session_id)
+            data = pipe.execute()[-1]
         
         if item:
-            data = self.client.hget(session_id, item)
-            return pickle.loads(data) if data else None
+            return orjson.loads(data) if data else None
         else:
-            data = self.client.hgetall(session_id)
             if not data:
                 return {}
-            return {k.decode() if isinstance(k, bytes) else k: pickle.loads(v) for k, v in data.items()}
+            return {k.decode() if isinstance(k, bytes) else k: orjson.loads(v) for k, v in data.items()}
 
     def delete_session(self, session_id: str):
-        self.client.delete(session_id)
-        self.client.delete(f"ttl:{session_id}")
+        self.client.delete(session_id, f"ttl:{session_id}")
+
+    def _refresh_ttl(self, pipe, session_id: str, ttl_val: int):
+        pipe.expire(session_id, ttl_val)
+        pipe.expire(f"ttl:{session_id}", ttl_val)
 
     def put(self, session_id: str, item: str, value: Any):
-        import pickle
+        import orjson
         ttl = self.client.get(f"ttl:{session_id}")
         if ttl:
             ttl_val = int(ttl)
-            self.client.hset(session_id, item, pickle.dumps(value))
-            self.client.expire(session_id, ttl_val)
-            self.client.expire(f"ttl:{session_id}", ttl_val)
+            with self.client.pipeline(transaction=False) as pipe:
+                pipe.hset(session_id, item, orjson.dumps(value))
+                self._refresh_ttl(pipe, session_id, ttl_val)
+                pipe.execute()
 
     def put_array_item(self, session_id: str, array_item: str, index: int, value: Any):
-        import pickle
-        ttl = self.client.get(f"ttl:{session_id}")
-        if ttl:
-            ttl_val = int(ttl)
-            data = self.client.hget(session_id, array_item)
-            arr = pickle.loads(data) if data else []
-            if not isinstance(arr, list):
-                arr = []
-            
-            if index == -1:
-                arr.append(value)
-            elif 0 <= index < len(arr):
-                arr[index] = value
-            elif index == len(arr):
-                arr.append(value)
-                
-            self.client.hset(session_id, array_item, pickle.dumps(arr))
-            self.client.expire(session_id, ttl_val)
-            self.client.expire(f"ttl:{session_id}", ttl_val)
+        self.put_array_items(session_id, array_item, [(index, value)])
+
+    def put_array_items(self, session_id: str, array_item: str, items: Iterable[Tuple[int, Any]]):
+        import orjson
+        import redis
+        items = list(items)
+        # The array is read and written back once for all the writes. WATCH makes
+        # the read-modify-write atomic: if another worker changes the session in
+        # between, the transaction is aborted and retried on the new array.
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(session_id)
+                    ttl = pipe.get(f"ttl:{session_id}")
+                    if not ttl:
+                        return
+                    ttl_val = int(ttl)
+                    data = pipe.hget(session_id, array_item)
+                    arr = orjson.loads(data) if data else []
+                    if not isinstance(arr, list):
+                        arr = []
+                    
+                    for index, value in items:
+                        _set_array_item(arr, index, value)
+                    
+                    pipe.multi()
+                    pipe.hset(session_id, array_item, orjson.dumps(arr))
+                    self._refresh_ttl(pipe, session_id, ttl_val)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
 
 def get_session_store(store_type: str = "memory", **kwargs) -> SessionStore:
     if store_type == "memory":
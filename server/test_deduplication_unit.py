@@ -30,6 +30,22 @@ def test_deduplication_proximity():
     
     print("Count-aware proximity deduplication verified!")
 
+def test_deduplication_proximity_large():
+    print("\nTesting BookDeduplicator.deduplicate_proximity on a large input...")
+    
+    # 100k books cycling through 50 ISBNs: with a window of 20 every repeat falls
+    # outside the window, with a window of 50 every repeat is a dupe
+    books = [{"title": f"Book {i % 50}", "isbn": str(i % 50), "frame_id": i // 50 + 1} for i in range(100_000)]
+    
+    deduplicated = BookDeduplicator.deduplicate_proximity(books, window_size=20)
+    assert len(deduplicated) == 100_000
+    
+    deduplicated = BookDeduplicator.deduplicate_proximity(books, window_size=50)
+    assert len(deduplicated) == 50
+    assert deduplicated[0]["frame_ids"] == list(range(1, 2001))
+    
+    print("Large proximity deduplication verified!")
+
 def test_deduplication_counting():
     print("\nTesting BookDeduplicator.deduplicate_counting...")
     
@@ -91,6 +107,7 @@ def test_deduplication_richness():
 if __name__ == "__main__":
     try:
         test_deduplication_proximity()
+        test_deduplication_proximity_large()
         test_deduplication_counting()
         test_deduplication_richness()
         print("\nAll unit tests passed!")
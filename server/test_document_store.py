@@ -1,32 +1,104 @@
 import unittest
-from dataclasses import dataclass
-from typing import Optional, Annotated, List, Tuple, Any
-from document_store import InMemoryDocumentStore, MongoDocumentStore, PartitionKey, SortKey, GetParams
+import uuid
+import atexit
+import os
+import socket
+from dataclasses import dataclass, field
+from typing import Optional, Annotated, List, Set, Tuple, Any
+from document_store import InMemoryDocumentStore, MongoDocumentStore, PartitionKey, SortKey, GetParams, make_from_dict, cached_hash
 from pymongo import MongoClient
 
-@dataclass(frozen=True)
+# The Mongo tests share one client. Each test class gets its own database and
+# each test its own uniquely named collection, so nothing is dropped between
+# tests and test processes can run in parallel (e.g. pytest-xdist) without
+# colliding. The databases are dropped once when the module finishes.
+# MongoClient connects lazily, so creating it here costs nothing when only
+# the in-memory tests run.
+_CLIENT = MongoClient("mongodb://localhost:27017/", maxPoolSize=4)
+atexit.register(_CLIENT.close)
+
+def _mongo_reachable() -> bool:
+    # A quick TCP probe, so the Mongo tests skip instead of each waiting out server selection
+    try:
+        socket.create_connection(("localhost", 27017), timeout=0.05).close()
+        return True
+    except OSError:
+        return False
+
+requires_mongo = unittest.skipUnless(_mongo_reachable(), "MongoDB is not reachable on localhost:27017")
+
+# Set by pytest-xdist in worker processes
+_WORKER_SUFFIX = f"_{os.environ['PYTEST_XDIST_WORKER']}" if "PYTEST_XDIST_WORKER" in os.environ else ""
+
+_created_databases: Set[str] = set()
+
+def _test_database(test_class: type) -> str:
+    name = f"test_db_{test_class.__name__}{_WORKER_SUFFIX}"
+    _created_databases.add(name)
+    return name
+
+def _unique_collection(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+class MongoStoreFixture:
+    """
+    Builds the store once per test class; each test starts from an emptied
+    collection, which keeps the collection and its indexes.
+    Subclasses set store_class and key_type.
+    """
+    store_class: type
+    key_type: type
+    
+    @classmethod
+    def make_store(cls):
+        return cls.store_class[cls.key_type, MyNote](
+            client=_CLIENT,
+            database_name=_test_database(cls),
+            collection_name=_unique_collection(cls.__name__),
+            key_type=cls.key_type,
+            data_type=MyNote
+        )
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.make_store()
+    
+    def setUp(self):
+        self.store.collection.delete_many({})
+
+def tearDownModule():
+    # Only talk to Mongo if a Mongo test actually ran
+    for database_name in _created_databases:
+        _CLIENT.drop_database(database_name)
+
+@dataclass(frozen=True, slots=True)
 class MyKey:
     user_id: Annotated[str, PartitionKey]
     note_id: Annotated[int, SortKey]
 
-@dataclass
+@dataclass(slots=True)
 class MyNote:
     title: str
     content: str
     category: str
 
-@dataclass(frozen=True)
+_note_from_dict = make_from_dict(MyNote)
+
+@cached_hash
+@dataclass(frozen=True, slots=True)
 class ComplexKey:
     org_id: Annotated[str, PartitionKey]
     dept_id: Annotated[int, PartitionKey]
     category: Annotated[str, SortKey]
     timestamp: Annotated[str, SortKey]
+    _cached_hash: Optional[int] = field(default=None, init=False, repr=False, compare=False, hash=False)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CategoryIndex:
     category: Annotated[str, PartitionKey]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SimpleKey:
     partition: Annotated[str, PartitionKey]
     value: Annotated[int, SortKey]
@@ -63,8 +135,12 @@ class MyKeyMyNoteTests:
         self.assertEqual(len(results), 3)
         for v in results.values():
             self.assertIsInstance(v, MyNote)
-        titles = sorted([v.title for v in results.values()])
-        self.assertEqual(titles, ["B1", "B2", "B3"])
+        titles = {v.title for v in results.values()}
+        self.assertEqual(titles, {"B1", "B2", "B3"})
+        
+        # Any iterable of keys works, repeated keys are fetched once
+        results = self.store.batch_get([k1, k2, k1])
+        self.assertEqual({v.title for v in results.values()}, {"B1", "B2"})
     
     def test_update_overwrite(self):
         key = MyKey("u_update", 1)
@@ -98,8 +174,8 @@ class MyKeyMyNoteTests:
         self.assertEqual(len(items), 2)
         for item in items:
             self.assertIsInstance(item, MyNote)
-        titles = sorted([item.title for item in items])
-        self.assertEqual(titles, ["T1", "T3"])
+        titles = {item.title for item in items}
+        self.assertEqual(titles, {"T1", "T3"})
     
     def test_index_range(self):
         k1 = MyKey("u1", 1)
@@ -118,12 +194,30 @@ class MyKeyMyNoteTests:
         self.assertEqual(len(items), 2)
         for item in items:
             self.assertIsInstance(item, MyNote)
-        titles = sorted([item.title for item in items])
-        self.assertEqual(titles, ["T1", "T2"])
+        titles = {item.title for item in items}
+        self.assertEqual(titles, {"T1", "T2"})
 
 class ComplexKeyMyNoteTests:
     """Tests using ComplexKey -> MyNote schema"""
     
+    def test_cached_key_hash(self):
+        k1 = ComplexKey(org_id="g", dept_id=1, category="A", timestamp="2026-01-01")
+        k2 = ComplexKey(org_id="g", dept_id=1, category="A", timestamp="2026-01-01")
+        
+        # The decorator wraps __hash__ in place rather than subclassing the key
+        self.assertEqual(ComplexKey.__mro__, (ComplexKey, object))
+        self.assertEqual(k1, k2)
+        self.assertIsNone(k1._cached_hash)
+        h = hash(k1)
+        self.assertEqual(k1._cached_hash, h)
+        self.assertEqual(hash(k2), h)
+        self.assertEqual(len({k1, k2}), 1)
+        
+        # Later hashes return the cached value rather than rehashing the fields
+        object.__setattr__(k1, "_cached_hash", h + 1)
+        self.assertEqual(hash(k1), h + 1)
+        self.assertEqual(self.store._get_key_tuple(k1), ("g", 1, "A", "2026-01-01"))
+    
     def test_complex_keys_crud(self):
         k1 = ComplexKey(org_id="g", dept_id=1, category="A", timestamp="2026-01-01")
         k2 = ComplexKey(org_id="g", dept_id=1, category="A", timestamp="2026-01-02")
@@ -204,6 +298,21 @@ class SimpleKeyMyNoteTests:
         self.assertIsInstance(retrieved, MyNote)
         self.assertEqual(retrieved.title, "T3")
 
+    def test_replace_range(self):
+        k1 = SimpleKey("p", 1)
+        k2 = SimpleKey("p", 5)
+        k3 = SimpleKey("p", 10)
+        
+        self.store.batch_put({k1: MyNote("T1", "C1", "A"), k2: MyNote("T2", "C2", "B"), k3: MyNote("T3", "C3", "C")})
+        
+        k4 = SimpleKey("p", 3)
+        self.store.replace_range(k1, k2, {k4: MyNote("T4", "C4", "D")})
+        
+        self.assertIsNone(self.store.get(k1))
+        self.assertIsNone(self.store.get(k2))
+        self.assertEqual(self.store.get(k4).title, "T4")
+        self.assertEqual(self.store.get(k3).title, "T3")
+
 # ============================================================================
 # Concrete Test Classes for InMemoryDocumentStore
 # ============================================================================
@@ -233,56 +342,69 @@ class TestInMemorySimpleKey(SimpleKeyMyNoteTests, unittest.TestCase):
 # Concrete Test Classes for MongoDocumentStore
 # ============================================================================
 
-class TestMongoMyKeyMyNote(MyKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoDocumentStore[MyKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_mykey_mynote",
-            key_type=MyKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
+@requires_mongo
+class TestMongoMyKeyMyNote(MongoStoreFixture, MyKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoDocumentStore
+    key_type = MyKey
 
-class TestMongoComplexKey(ComplexKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoDocumentStore[ComplexKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_complexkey_mynote",
-            key_type=ComplexKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
+@requires_mongo
+class TestMongoComplexKey(MongoStoreFixture, ComplexKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoDocumentStore
+    key_type = ComplexKey
 
-class TestMongoSimpleKey(SimpleKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoDocumentStore[SimpleKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_simplekey_mynote",
-            key_type=SimpleKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
+@requires_mongo
+class TestMongoSimpleKey(MongoStoreFixture, SimpleKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoDocumentStore
+    key_type = SimpleKey
+
+    def test_get_range_filtered(self):
+        k1 = SimpleKey("p", 1)
+        k2 = SimpleKey("p", 5)
+        k3 = SimpleKey("p", 10)
+        
+        self.store.put(k1, MyNote("T1", "C1", "A"))
+        self.store.put(k2, MyNote("T2", "C2", "B"))
+        self.store.put(k3, MyNote("T3", "C3", "A"))
+        
+        items = self.store.get_range_filtered(k1, k3, {"category": "A"})
+        self.assertEqual([v.title for _, v in items], ["T1", "T3"])
+        self.assertIsInstance(items[0][1], MyNote)
+        
+        # Projection: partial data comes back as a dict
+        items = self.store.get_range_filtered(k1, k3, {"category": "B"}, data_fields=["title"])
+        self.assertEqual(items, [(k2, {"title": "T2"})])
+
+    def test_create_index(self):
+        self.store.create_index(CategoryIndex)
+        index_keys = [info["key"] for info in self.store.collection.index_information().values()]
+        self.assertIn([("data.category", 1)], index_keys)
+        
+        self.store.put(SimpleKey("p", 1), MyNote("T1", "C1", "A"))
+        self.assertEqual([n.title for n in self.store.get_by_index(CategoryIndex(category="A"))], ["T1"])
+
+    def test_covered_index_lookup(self):
+        self.store.create_index(CategoryIndex, covered_fields=["title"])
+        index_keys = [info["key"] for info in self.store.collection.index_information().values()]
+        self.assertIn([("data.category", 1), ("data.title", 1)], index_keys)
+        
+        self.store.put(SimpleKey("p", 1), MyNote("T1", "C1", "A"))
+        self.store.put(SimpleKey("p", 2), MyNote("T2", "C2", "B"))
+        self.assertEqual(self.store.get_by_index(CategoryIndex(category="A"), data_fields=["title"]),
+                         [{"category": "A", "title": "T1"}])
+        items = self.store.get_by_index_range(CategoryIndex(category="A"), CategoryIndex(category="B"), data_fields=["title"])
+        self.assertEqual([item["title"] for item in items], ["T1", "T2"])
+        # Without data_fields the full value is still returned
+        self.assertIsInstance(self.store.get_by_index(CategoryIndex(category="B"))[0], MyNote)
+
+    def test_get_range_stream(self):
+        k1 = SimpleKey("p", 1)
+        k2 = SimpleKey("p", 5)
+        
+        self.store.put(k1, MyNote("T1", "C1", "A"))
+        self.store.put(k2, MyNote("T2", "C2", "B"))
+        
+        items = list(self.store.get_range_stream(k1, k2, data_fields=["title"]))
+        self.assertEqual(items, [(k1, {"title": "T1"}), (k2, {"title": "T2"})])
 
 # ============================================================================
 # Concrete Test Classes for MongoEmbeddedDocumentStore
@@ -290,84 +412,53 @@ class TestMongoSimpleKey(SimpleKeyMyNoteTests, unittest.TestCase):
 
 from document_store import MongoEmbeddedDocumentStore
 
-class TestEmbeddedMyKeyMyNote(MyKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoEmbeddedDocumentStore[MyKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_embedded_mykey",
-            key_type=MyKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
-
-class TestEmbeddedComplexKey(ComplexKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoEmbeddedDocumentStore[ComplexKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_embedded_complex",
-            key_type=ComplexKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
-
-class TestEmbeddedSimpleKey(SimpleKeyMyNoteTests, unittest.TestCase):
-    def setUp(self):
-        self.store = MongoEmbeddedDocumentStore[SimpleKey, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name="test_embedded_simple",
-            key_type=SimpleKey,
-            data_type=MyNote
-        )
-        self.store.drop_table()
-        self.store.create_table()
-    
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
-
-if __name__ == "__main__":
-    unittest.main()
-
-
-@dataclass(frozen=True)
-class MyKey:
-    user_id: Annotated[str, PartitionKey]
-    note_id: Annotated[int, SortKey]
-
-@dataclass
-class MyNote:
-    title: str
-    content: str
-    category: str
-
-@dataclass(frozen=True)
-class ComplexKey:
-    org_id: Annotated[str, PartitionKey]
-    dept_id: Annotated[int, PartitionKey]
-    category: Annotated[str, SortKey]
-    timestamp: Annotated[str, SortKey]
-
-@dataclass(frozen=True)
-class CategoryIndex:
-    category: Annotated[str, PartitionKey]
-
-@dataclass(frozen=True)
+@requires_mongo
+class TestEmbeddedMyKeyMyNote(MongoStoreFixture, MyKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoEmbeddedDocumentStore
+    key_type = MyKey
+
+@requires_mongo
+class TestEmbeddedComplexKey(MongoStoreFixture, ComplexKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoEmbeddedDocumentStore
+    key_type = ComplexKey
+
+@requires_mongo
+class TestEmbeddedSimpleKey(MongoStoreFixture, SimpleKeyMyNoteTests, unittest.TestCase):
+    store_class = MongoEmbeddedDocumentStore
+    key_type = SimpleKey
+
+    def test_create_index(self):
+        self.store.create_index(CategoryIndex)
+        index_keys = [info["key"] for info in self.store.collection.index_information().values()]
+        self.assertIn([("items.d.category", 1)], index_keys)
+        
+        self.store.put(SimpleKey("p", 1), MyNote("T1", "C1", "A"))
+        self.store.put(SimpleKey("p", 2), MyNote("T2", "C2", "B"))
+        self.assertEqual([n.title for n in self.store.get_by_index(CategoryIndex(category="A"))], ["T1"])
+
+    def test_index_projection(self):
+        self.store.put(SimpleKey("p", 1), MyNote("T1", "C1", "A"))
+        self.store.put(SimpleKey("p", 2), MyNote("T2", "C2", "B"))
+        self.store.put(SimpleKey("q", 1), MyNote("Q1", "C3", "A"))
+        
+        items = self.store.get_by_index(CategoryIndex(category="A"), data_fields=["title"])
+        self.assertEqual({item["title"] for item in items}, {"T1", "Q1"})
+        self.assertNotIn("content", items[0])
+        
+        items = self.store.get_by_index_range(CategoryIndex(category="A"), CategoryIndex(category="B"), data_fields=["title"])
+        self.assertEqual([item["title"] for item in items if item["category"] == "B"], ["T2"])
+        self.assertTrue(all(set(item) == {"title", "category"} for item in items))
+
+    def test_batch_put_overwrites(self):
+        self.store.batch_put({SimpleKey("p", 1): MyNote("T1", "C1", "A"), SimpleKey("q", 1): MyNote("Q1", "C", "A")})
+        self.store.batch_put({SimpleKey("p", 1): MyNote("T1b", "C1", "A"), SimpleKey("p", 2): MyNote("T2", "C2", "B")})
+        
+        self.assertEqual(self.store.get(SimpleKey("p", 1)).title, "T1b")
+        self.assertEqual(self.store.get(SimpleKey("p", 2)).title, "T2")
+        self.assertEqual(self.store.get(SimpleKey("q", 1)).title, "Q1")
+        self.assertEqual(len(self.store.collection.find_one({"_id": {"partition": "p"}})["items"]), 2)
+
+@dataclass(frozen=True, slots=True)
 class OrderedKey:
     # Defined first, but order=2 so it's the second part of the sort key
     suffix: Annotated[str, SortKey(order=2)]
@@ -453,8 +544,8 @@ class DocumentStoreTestMixin:
         self.assertEqual(len(items), 2)
         for item in items:
             self.assertIsInstance(item, MyNote)
-        titles = sorted([item.title for item in items])
-        self.assertEqual(titles, ["T1", "T2"])
+        titles = {item.title for item in items}
+        self.assertEqual(titles, {"T1", "T2"})
         
         # Iterator
         it = self.store.get_index_range_iterator(idx_start, idx_end)
@@ -485,11 +576,11 @@ class DocumentStoreTestMixin:
         self.assertEqual(len(items), 2)
         for item in items:
             self.assertIsInstance(item, MyNote)
-        titles = sorted([item.title for item in items])
-        self.assertEqual(titles, ["T1", "T3"])
+        titles = {item.title for item in items}
+        self.assertEqual(titles, {"T1", "T3"})
 
     def test_reverse_and_iterators(self):
-        @dataclass(frozen=True)
+        @dataclass(frozen=True, slots=True)
         class PIntKey:
             partition: Annotated[str, PartitionKey]
             value: Annotated[int, SortKey]
@@ -522,7 +613,7 @@ class DocumentStoreTestMixin:
         self.assertEqual(items_rev[2][1].title, "T1")
 
     def test_delete_range(self):
-        @dataclass(frozen=True)
+        @dataclass(frozen=True, slots=True)
         class PIntKey:
             partition: Annotated[str, PartitionKey]
             value: Annotated[int, SortKey]
@@ -596,8 +687,7 @@ class DocumentStoreTestMixin:
     def test_multiple_items_in_partition(self):
         # Using MyKey which has (user_id, note_id)
         user = "u_multi"
-        for i in range(5):
-            self.store.put(MyKey(user, i), MyNote(f"T{i}", "C", "A"))
+        self.store.batch_put({MyKey(user, i): MyNote(f"T{i}", "C", "A") for i in range(5)})
             
         for i in range(5):
             retrieved = self.store.get(MyKey(user, i))
@@ -615,48 +705,33 @@ class DocumentStoreTestMixin:
 class TestInMemoryDocumentStore(DocumentStoreTestMixin, unittest.TestCase):
     def setUp(self):
         self.store = InMemoryDocumentStore[Any, MyNote](
-            from_dict_fn=lambda d: MyNote(**d) if d and "title" in d else d # type: ignore
+            from_dict_fn=_note_from_dict
         )
 
+@requires_mongo
 class TestMongoDocumentStore(DocumentStoreTestMixin, unittest.TestCase):
-    from pymongo import MongoClient
+    # These stores learn their key schema from the first key they see and the
+    # tests use several key types, so each test gets a fresh store
     def setUp(self):
-        # We no longer skip if Mongo is not reachable, to help with debugging.
-        self.collection_name = "test_collection_unique"
         self.store = MongoDocumentStore[Any, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_db",
-            collection_name=self.collection_name,
-            from_dict_fn=lambda d: MyNote(**d) if d and "title" in d else d # type: ignore
+            client=_CLIENT,
+            database_name=_test_database(type(self)),
+            collection_name=_unique_collection("test_collection"),
+            from_dict_fn=_note_from_dict
         )
-        # Clear if exists
-        self.store.drop_table()
-        self.store.create_table()
-
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
 
 
-from document_store import MongoEmbeddedDocumentStore
-
+@requires_mongo
 class TestMongoEmbeddedDocumentStore(DocumentStoreTestMixin, unittest.TestCase):
+    # These stores learn their key schema from the first key they see and the
+    # tests use several key types, so each test gets a fresh store
     def setUp(self):
-        self.collection_name = "test_embedded_collection"
         self.store = MongoEmbeddedDocumentStore[Any, MyNote](
-            client=MongoClient("mongodb://localhost:27017/"),
-            database_name="test_social_lib",
-            collection_name=self.collection_name,
-            from_dict_fn=lambda d: MyNote(**d) if d and "title" in d else d
+            client=_CLIENT,
+            database_name=_test_database(type(self)),
+            collection_name=_unique_collection("test_embedded_collection"),
+            from_dict_fn=_note_from_dict
         )
-        self.store.drop_table()
-        self.store.create_table()
-
-    def tearDown(self):
-        if hasattr(self, 'store'):
-            self.store.drop_table()
-            self.store.close()
 
 if __name__ == "__main__":
     unittest.main()
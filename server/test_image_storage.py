@@ -1,4 +1,5 @@
 import unittest
+import io
 import os
 import shutil
 from image_storage import FileShelfImageStorage, get_image_storage
@@ -28,6 +29,28 @@ class TestImageStorage(unittest.TestCase):
         with open(path, "rb") as f:
             self.assertEqual(f.read(), image_bytes)
 
+    def test_file_storage_save_stream(self):
+        image_bytes = b"fake-image-data" * 1000
+        
+        path = self.storage.save_image("user123", "frame789", io.BytesIO(image_bytes))
+        
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), image_bytes)
+
+    def test_batch_save(self):
+        images = [(f"frame{i}", f"image-{i}".encode()) for i in range(20)]
+        images.append(("frame_stream", io.BytesIO(b"streamed-image")))
+        
+        paths = self.storage.save_images_batch("user123", images)
+        
+        self.assertEqual(len(paths), 21)
+        for (frame_id, _), path in zip(images, paths):
+            self.assertIn(frame_id, path)
+        with open(paths[3], "rb") as f:
+            self.assertEqual(f.read(), b"image-3")
+        with open(paths[-1], "rb") as f:
+            self.assertEqual(f.read(), b"streamed-image")
+
     def test_factory(self):
         storage = get_image_storage("file", base_path=self.test_dir)
         self.assertIsInstance(storage, FileShelfImageStorage)
@@ -1,5 +1,7 @@
 import requests
 import json
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 import os
 from PIL import Image
 import io
@@ -7,31 +9,24 @@ import io
 # Constants
 BASE_URL = "http://127.0.0.1:8000"
 
-def test_upload_next_frame():
-    print("Testing /upload_next_frame with enrichment/counting...")
-    # Create a dummy image
-    img = Image.new('RGB', (100, 100), color = 'red')
+# One session so the requests below reuse a kept-alive connection
+SESSION = requests.Session()
+atexit.register(SESSION.close)
+
+def _make_jpeg(size, color) -> bytes:
+    img = Image.new('RGB', size, color = color)
     img_byte_arr = io.BytesIO()
     img.save(img_byte_arr, format='JPEG')
-    img_byte_arr = img_byte_arr.getvalue()
-    
-    files = {'file': ('test.jpg', img_byte_arr, 'image/jpeg')}
-    response = requests.post(f"{BASE_URL}/upload_next_frame", files=files)
-    
-    print(f"Status Code: {response.status_code}")
-    res_json = response.json()
-    print(f"Response: {res_json}")
-    
-    assert response.status_code == 200
-    assert res_json["status"] == "success"
-    # Even if no books found, structure should be there or handled
-    if "books" in res_json:
-        print(f"Found {len(res_json['books'])} enriched books")
-        assert "enrichment_stats" in res_json
+    return img_byte_arr.getvalue()
 
-def test_complete_upload_proximity():
-    print("\nTesting /complete_upload with proximity deduplication and frame_ids...")
-    results = [
+# Dummy images, encoded once
+RED_JPEG = _make_jpeg((100, 100), 'red')
+BLUE_JPEG = _make_jpeg((10, 10), 'blue')
+
+# Constant /complete_upload payloads, serialized once
+JSON_HEADERS = {"Content-Type": "application/json"}
+PROXIMITY_UPLOAD_BODY = json.dumps({
+    "results": [
         {
             "frame_id": 101,
             "books": [
@@ -46,10 +41,33 @@ def test_complete_upload_proximity():
                 {"title": "Animal Farm", "author": "George Orwell", "isbn": "789"}
             ]
         }
-    ]
+    ],
+    "user_id": "test_user_1"
+})
+# 12 dummy books
+CHUNKED_UPLOAD_BODY = json.dumps({
+    "results": [{"books": [{"title": f"Book {i}", "author": f"Author {i}"} for i in range(1, 13)]}]
+})
+
+def test_upload_next_frame():
+    print("Testing /upload_next_frame with enrichment/counting...")
+    files = {'file': ('test.jpg', RED_JPEG, 'image/jpeg')}
+    response = SESSION.post(f"{BASE_URL}/upload_next_frame", files=files)
     
-    data = {"results": results, "user_id": "test_user_1"}
-    response = requests.post(f"{BASE_URL}/complete_upload", json=data)
+    print(f"Status Code: {response.status_code}")
+    res_json = response.json()
+    print(f"Response: {res_json}")
+    
+    assert response.status_code == 200
+    assert res_json["status"] == "success"
+    # Even if no books found, structure should be there or handled
+    if "books" in res_json:
+        print(f"Found {len(res_json['books'])} enriched books")
+        assert "enrichment_stats" in res_json
+
+def test_complete_upload_proximity():
+    print("\nTesting /complete_upload with proximity deduplication and frame_ids...")
+    response = SESSION.post(f"{BASE_URL}/complete_upload", data=PROXIMITY_UPLOAD_BODY, headers=JSON_HEADERS)
     
     print(f"Status Code: {response.status_code}")
     res_json = response.json()
@@ -74,7 +92,7 @@ def test_complete_upload_proximity():
 def test_enrich_book():
     print("\nTesting /enrich_book with diagnostics...")
     book = {"title": "The Great Gatsby", "author": "Fitzgerald"}
-    response = requests.post(f"{BASE_URL}/enrich_book", json=book)
+    response = SESSION.post(f"{BASE_URL}/enrich_book", json=book)
     
     print(f"Status Code: {response.status_code}")
     res_json = response.json()
@@ -91,7 +109,7 @@ def test_enrich_books():
         {"title": "The Great Gatsby", "author": "Fitzgerald"},
         {"title": "1984", "author": "Orwell"}
     ]
-    response = requests.post(f"{BASE_URL}/enrich_books", json=books)
+    response = SESSION.post(f"{BASE_URL}/enrich_books", json=books)
     
     print(f"Status Code: {response.status_code}")
     res_json = response.json()
@@ -105,12 +123,7 @@ def test_enrich_books():
 
 def test_complete_upload_chunked():
     print("\nTesting /complete_upload with proximity deduplication stats...")
-    # Generate 12 dummy books
-    books = [{"title": f"Book {i}", "author": f"Author {i}"} for i in range(1, 13)]
-    results = [{"books": books}]
-    
-    data = {"results": results}
-    response = requests.post(f"{BASE_URL}/complete_upload", json=data)
+    response = SESSION.post(f"{BASE_URL}/complete_upload", data=CHUNKED_UPLOAD_BODY, headers=JSON_HEADERS)
     
     print(f"Status Code: {response.status_code}")
     res_json = response.json()
@@ -132,17 +145,11 @@ def test_user_library():
     # just called complete_upload directly without upload_frame (so no metadata was created).
     
     # We can try to hit upload_frame to create metadata for a specific frame_id
-    # Create a dummy image
-    img = Image.new('RGB', (10, 10), color = 'blue')
-    img_byte_arr = io.BytesIO()
-    img.save(img_byte_arr, format='JPEG')
-    img_byte_arr = img_byte_arr.getvalue()
-    
     user_id = "test_user_1"
     frame_id = 101 # Matches frame_id in test_complete_upload_proximity
     
     # Upload frame to set metadata
-    files = {'file': ('shelf.jpg', img_byte_arr, 'image/jpeg')}
+    files = {'file': ('shelf.jpg', BLUE_JPEG, 'image/jpeg')}
     data = {"session_id": "sess_101", "frame_id": frame_id, "user_id": user_id, "name": "Living Room"}
     
     # We expect this to fail or do something if Gemini is not mocked, but we just want metadata saved.
@@ -155,7 +162,7 @@ def test_user_library():
     # Or we can assume test_upload_next_frame works?
     
     # Let's try to query it. At least unshelved books should appear if frame metadata is missing.
-    response = requests.get(f"{BASE_URL}/user_library?user_id={user_id}")
+    response = SESSION.get(f"{BASE_URL}/user_library?user_id={user_id}")
     
     print(f"Status Code: {response.status_code}")
     res_json = response.json()
@@ -183,10 +190,15 @@ def test_user_library():
 if __name__ == "__main__":
     try:
         # test_upload_next_frame() # This requires Gemini key and real image processing, might be slow/expensive
-        test_complete_upload_proximity()
-        test_enrich_book()
-        test_enrich_books()
-        test_complete_upload_chunked()
+        # These are independent of each other, so run them concurrently
+        concurrent_tests = (test_complete_upload_proximity, test_enrich_book, test_enrich_books, test_complete_upload_chunked)
+        with ThreadPoolExecutor(max_workers=len(concurrent_tests)) as executor:
+            futures = {test.__name__: executor.submit(test) for test in concurrent_tests}
+        # Report every failure rather than just the first
+        failures = [f"{name}: {future.exception()!r}" for name, future in futures.items() if future.exception()]
+        if failures:
+            raise AssertionError("; ".join(failures))
+        # Relies on the books saved by test_complete_upload_proximity
         test_user_library()
         print("\nAll tests passed!")
     except Exception as e:
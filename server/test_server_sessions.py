@@ -1,47 +1,55 @@
 import requests
 import json
 import time
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 import io
 from PIL import Image
 
 BASE_URL = "http://localhost:8000"
 
-def create_test_image():
+# One session so the requests below reuse a kept-alive connection
+SESSION = requests.Session()
+atexit.register(SESSION.close)
+
+def _encode_test_image() -> bytes:
     file = io.BytesIO()
     image = Image.new('RGB', (100, 100), color=(73, 109, 137))
     image.save(file, 'PNG')
-    file.seek(0)
-    return file
+    return file.getvalue()
+
+# Encoded once, each upload gets its own stream over the same bytes
+TEST_IMAGE_PNG = _encode_test_image()
+
+def create_test_image():
+    return io.BytesIO(TEST_IMAGE_PNG)
 
 def test_session_flow():
     print("Testing session-based upload flow...")
     
     # 1. Init Session
     print("\n1. Initializing session...")
-    resp = requests.get(f"{BASE_URL}/init_upload")
+    resp = SESSION.get(f"{BASE_URL}/init_upload")
     assert resp.status_code == 200
     session_id = resp.json()["session_id"]
     print(f"   Session ID: {session_id}")
     
-    # 2. Upload frame with session_id and frame_id
-    print("\n2. Uploading frame with session_id and frame_id...")
-    img_file = create_test_image()
-    files = {"file": ("test.png", img_file, "image/png")}
-    data = {"session_id": session_id, "frame_id": 1, "user_id": "test_user"}
-    resp = requests.post(f"{BASE_URL}/upload_frame", files=files, data=data)
+    # 2. Upload two frames with session_id and frame_id
+    # Frames are stored per frame_id, so the uploads can run concurrently
+    print("\n2. Uploading frames 1 and 2 with session_id and frame_id...")
+    def upload(frame_id):
+        files = {"file": (f"test{frame_id}.png", create_test_image(), "image/png")}
+        data = {"session_id": session_id, "frame_id": frame_id, "user_id": "test_user"}
+        return SESSION.post(f"{BASE_URL}/upload_frame", files=files, data=data)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resp, resp2 = executor.map(upload, (1, 2))
     print(f"   Status: {resp.status_code}")
     assert resp.status_code == 200
     resp_json = resp.json()
     assert "session_id" in resp_json
     assert "frame_id" in resp_json
     print(f"   Books found: {len(resp_json.get('books', []))}")
-
-    # Upload another frame
-    print("\n2b. Uploading second frame...")
-    img_file2 = create_test_image()
-    files2 = {"file": ("test2.png", img_file2, "image/png")}
-    data2 = {"session_id": session_id, "frame_id": 2, "user_id": "test_user"}
-    resp2 = requests.post(f"{BASE_URL}/upload_frame", files=files2, data=data2)
     assert resp2.status_code == 200
     print(f"   Frame 2 status: {resp2.status_code}")
 
@@ -52,7 +60,7 @@ def test_session_flow():
         "session_id": session_id,
         "enrich": False
     }
-    resp = requests.post(f"{BASE_URL}/complete_upload", json=payload)
+    resp = SESSION.post(f"{BASE_URL}/complete_upload", json=payload)
     print(f"   Status: {resp.status_code}")
     assert resp.status_code == 200
     final_json = resp.json()
@@ -62,7 +70,7 @@ def test_session_flow():
     # 4. Verify session is deleted
     print("\n4. Verifying session is deleted...")
     # Trying to complete again with the same session_id should fail
-    resp = requests.post(f"{BASE_URL}/complete_upload", json=payload)
+    resp = SESSION.post(f"{BASE_URL}/complete_upload", json=payload)
     print(f"   Second attempt status: {resp.status_code}")
     assert resp.status_code == 200
     assert resp.json()["status"] == "error"
@@ -5,7 +5,9 @@ from session_manager import InMemorySessionStore, RedisSessionStore
 class TestSessionManager(unittest.TestCase):
     def test_in_memory_session(self):
         print("Testing InMemorySessionStore...")
-        store = InMemorySessionStore()
+        # Advance a fake clock instead of sleeping through the TTLs
+        now = [0.0]
+        store = InMemorySessionStore(clock=lambda: now[0])
         session_id = "test-123"
         data = {"user": "alice", "items": [1, 2, 3]}
         
@@ -19,16 +21,15 @@ class TestSessionManager(unittest.TestCase):
         self.assertEqual(store.get_session(session_id), new_data)
         
         # Test TTL Expiry (Sliding Window)
-        time.sleep(1.5)
+        now[0] += 1.5
         # Accessing should refresh the TTL
         self.assertEqual(store.get_session(session_id), new_data)
         
-        time.sleep(1.5)
+        now[0] += 1.5
         self.assertEqual(store.get_session(session_id), new_data)
         
         # Now wait longer than TTL
-        print("  Waiting for TTL expiry...")
-        time.sleep(2.5)
+        now[0] += 2.5
         self.assertIsNone(store.get_session(session_id))
         
         # Test Delete
@@ -52,6 +53,10 @@ class TestSessionManager(unittest.TestCase):
         self.assertEqual(store.get_session("granular", "my_list"), ["fixed_first", "second"])
         store.put_array_item("granular", "my_list", 2, "third") # Append via index
         self.assertEqual(store.get_session("granular", "my_list"), ["fixed_first", "second", "third"])
+        
+        # Test put_array_items
+        store.put_array_items("granular", "batch_list", [(-1, "a"), (-1, "b"), (0, "A"), (2, "c"), (9, "ignored")])
+        self.assertEqual(store.get_session("granular", "batch_list"), ["A", "b", "c"])
 
         print("InMemorySessionStore granular methods verified!")
 
@@ -87,6 +92,14 @@ class TestSessionManager(unittest.TestCase):
         time.sleep(2.5)
         self.assertIsNone(store.get_session(session_id))
         
+        # Test Granular Array Writes
+        store.create_session("granular", {"existing": 1}, 10)
+        store.put_array_item("granular", "my_list", -1, "first")
+        store.put_array_items("granular", "my_list", [(-1, "second"), (0, "fixed_first"), (2, "third")])
+        self.assertEqual(store.get_session("granular", "my_list"), ["fixed_first", "second", "third"])
+        self.assertEqual(store.get_session("granular", "existing"), 1)
+        store.delete_session("granular")
+        
         # Test Delete
         store.create_session("del", 123, 10)
         store.delete_session("del")